@@ -0,0 +1,134 @@
+# benchmark for the vtr to vdb conversion on a synthetic rectilinear grid
+# run with the python that has vtk, scipy and pyopenvdb available (blender's or system's)
+#   python3 benchmarks/convert_bench.py [grid size] [dicing factor]
+#   python3 benchmarks/convert_bench.py read [grid size]
+import sys
+import os
+import time
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'operators'))
+import convert
+from convert import vdb, np
+import vtk
+from vtk.util.numpy_support import numpy_to_vtk
+
+def make_synthetic_vtr(filename, size=96, raw=False):
+    """Write a non-uniform rectilinear grid with a decaying dipole-like E field. 
+    raw writes uncompressed appended data, which the native reader maps directly"""
+    # denser lines near the center, like a mesh refined around a feed
+    axis = np.sinh(np.linspace(-3, 3, size)) / np.sinh(3)
+    grid = vtk.vtkRectilinearGrid()
+    grid.SetDimensions(size, size, size)
+    for setter in (grid.SetXCoordinates, grid.SetYCoordinates, grid.SetZCoordinates):
+        coords = vtk.vtkDoubleArray()
+        for value in axis:
+            coords.InsertNextValue(value)
+        setter(coords)
+
+    # x fastest, same ordering as openEMS dumps
+    z, y, x = np.meshgrid(axis, axis, axis, indexing='ij')
+    r = np.sqrt(x**2 + y**2 + z**2) + 1e-3
+    field = np.stack((x / r**3, y / r**3, z / r**3), axis=-1).reshape(-1, 3)
+
+    array = numpy_to_vtk(field.astype(np.float32), deep=1)
+    array.SetName('E-Field')
+    grid.GetPointData().AddArray(array)
+
+    writer = vtk.vtkXMLRectilinearGridWriter()
+    writer.SetFileName(filename)
+    writer.SetInputData(grid)
+    if raw:
+        writer.SetDataModeToAppended()
+        writer.EncodeAppendedDataOff()
+        writer.SetCompressorTypeToNone()
+    writer.Write()
+
+def write_per_voxel(volume, name):
+    """Reference per-voxel population, as done before the bulk copy"""
+    grid = vdb.FloatGrid()
+    grid.name = name
+    accessor = grid.getAccessor()
+    for index_x in range(volume.shape[0]):
+        for index_y in range(volume.shape[1]):
+            for index_z in range(volume.shape[2]):
+                accessor.setValueOn((index_x, index_y, index_z),
+                                    volume[index_x][index_y][index_z])
+    return grid
+
+def bench(size=96, dicing_factor=2):
+    tmp_dir = tempfile.mkdtemp()
+    vtr_file = os.path.join(tmp_dir, 'bench.vtr')
+    vdb_file = os.path.join(tmp_dir, 'bench.vdb')
+    make_synthetic_vtr(vtr_file, size)
+
+    time_start = time.time()
+    convert.vtr_to_vdb(vtr_file, vdb_file, dicing_factor)
+    time_total = time.time() - time_start
+
+    grids, _ = vdb.readAll(vdb_file)
+    volumes = {}
+    for grid in grids:
+        bbox_min, bbox_max = grid.evalActiveVoxelBoundingBox()
+        volume = np.zeros(tuple(np.array(bbox_max) + 1), dtype=np.float32)
+        grid.copyToArray(volume)
+        volumes[grid.name] = volume
+
+    # time the two population paths on the very same volumes
+    time_start = time.time()
+    reference = {name: write_per_voxel(volume, name) for name, volume in volumes.items()}
+    time_per_voxel = time.time() - time_start
+
+    time_start = time.time()
+    bulk = {name: convert.volume_to_grid(volume, name) for name, volume in volumes.items()}
+    time_bulk = time.time() - time_start
+
+    for name, volume in volumes.items():
+        a = np.zeros_like(volume)
+        b = np.zeros_like(volume)
+        reference[name].copyToArray(a)
+        bulk[name].copyToArray(b)
+        assert np.array_equal(a, b), f"grid {name} differs"
+
+    voxels = sum(volume.size for volume in volumes.values())
+    print(f"{size}^3 input, dicing factor {dicing_factor}: {voxels} voxels in {len(volumes)} grids")
+    print(f"full conversion         {time_total:8.3f}s")
+    print(f"per-voxel setValueOn    {time_per_voxel:8.3f}s")
+    print(f"bulk copyFromArray      {time_bulk:8.3f}s ({time_per_voxel / time_bulk:.0f}x)")
+
+def bench_read(size=256, repeat=3):
+    """Compare the memory mapped reader with the vtk one on the same raw dump"""
+    tmp_dir = tempfile.mkdtemp()
+    vtr_file = os.path.join(tmp_dir, 'bench_read.vtr')
+    make_synthetic_vtr(vtr_file, size, raw=True)
+
+    timings = {}
+    results = {}
+    for name, reader in (('vtk', convert.read_vtr_vtk), ('native', convert.read_vtr_native)):
+        best = None
+        for _ in range(repeat):
+            time_start = time.time()
+            axes, point_data = reader(vtr_file)
+            # touch the data like the conversion does, the native reader is lazy
+            magnitude = np.linalg.norm(point_data, axis=-1)
+            elapsed = time.time() - time_start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+        results[name] = (axes, magnitude)
+
+    for axis_vtk, axis_native in zip(results['vtk'][0], results['native'][0]):
+        assert np.array_equal(axis_vtk, axis_native), "axes differ"
+    assert np.array_equal(results['vtk'][1], results['native'][1]), "field differs"
+
+    size_mb = os.path.getsize(vtr_file) / 1024**2
+    print(f"{size}^3 raw appended dump, {size_mb:.0f} MB, best of {repeat}")
+    print(f"vtkXMLRectilinearGridReader {timings['vtk']:8.3f}s")
+    print(f"native mmap reader          {timings['native']:8.3f}s ({timings['vtk'] / timings['native']:.1f}x)")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'read':
+        bench_read(int(sys.argv[2]) if len(sys.argv) > 2 else 256)
+    else:
+        size = int(sys.argv[1]) if len(sys.argv) > 1 else 96
+        dicing_factor = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+        bench(size, dicing_factor)
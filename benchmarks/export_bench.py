@@ -0,0 +1,95 @@
+# benchmark for handing volume meshes over to CSXCAD on a synthetic triangulated sphere
+# run with the python that has CSXCAD available (blender's or system's)
+#   python3 benchmarks/export_bench.py [subdivisions] [repeat]
+import sys
+import os
+import time
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'operators'))
+import csx_export
+from csx_export import np
+from CSXCAD import ContinuousStructure
+
+def make_sphere(subdivisions=256):
+    """Triangulated UV sphere, about 2 * subdivisions^2 triangles"""
+    theta = np.linspace(0, np.pi, subdivisions + 1)[1:-1]
+    phi = np.linspace(0, 2 * np.pi, subdivisions, endpoint=False)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    vertices = np.stack((np.sin(t) * np.cos(p), np.sin(t) * np.sin(p), np.cos(t)), axis=-1).reshape(-1, 3)
+    vertices = np.vstack((vertices, [[0, 0, 1], [0, 0, -1]]))
+
+    rings, count = t.shape
+    index = np.arange(rings * count).reshape(rings, count)
+    a = index[:-1]
+    b = np.roll(index[:-1], -1, axis=1)
+    c = index[1:]
+    d = np.roll(index[1:], -1, axis=1)
+    faces = [np.stack((a, c, b), axis=-1).reshape(-1, 3),
+             np.stack((b, c, d), axis=-1).reshape(-1, 3)]
+
+    # caps
+    top, bottom = len(vertices) - 2, len(vertices) - 1
+    faces.append(np.stack((np.full(count, top), index[0], np.roll(index[0], -1)), axis=-1))
+    faces.append(np.stack((np.full(count, bottom), np.roll(index[-1], -1), index[-1]), axis=-1))
+    return vertices, np.vstack(faces)
+
+def write_ascii_stl(stl_file, vertices, faces):
+    """Reference ascii STL, the format blender's exporter used to write for us"""
+    normals = csx_export.triangle_normals(vertices, faces)
+    triangles = vertices[faces]
+    with open(stl_file, 'w') as f:
+        f.write("solid bench\n")
+        for normal, triangle in zip(normals, triangles):
+            f.write(f" facet normal {normal[0]:e} {normal[1]:e} {normal[2]:e}\n  outer loop\n")
+            for vertex in triangle:
+                f.write(f"   vertex {vertex[0]:e} {vertex[1]:e} {vertex[2]:e}\n")
+            f.write("  endloop\n endfacet\n")
+        f.write("endsolid bench\n")
+
+def ascii_path(metal, vertices, faces, tmp_dir):
+    stl_file = os.path.join(tmp_dir, 'ascii.stl')
+    write_ascii_stl(stl_file, vertices, faces)
+    reader = metal.AddPolyhedronReader(stl_file)
+    reader.SetFileType(1)
+    reader.ReadFile()
+    reader.Update()
+
+def binary_path(metal, vertices, faces, tmp_dir):
+    csx_export.add_polyhedron(metal, vertices, faces, os.path.join(tmp_dir, 'binary.stl'))
+
+def memory_path(metal, vertices, faces, tmp_dir):
+    csx_export.add_polyhedron(metal, vertices, faces)
+
+def bench(subdivisions=256, repeat=3):
+    tmp_dir = tempfile.mkdtemp()
+    vertices, faces = make_sphere(subdivisions)
+
+    # the STL written for the fallback has to hold the very same triangles
+    stl_file = os.path.join(tmp_dir, 'check.stl')
+    csx_export.write_binary_stl(stl_file, vertices, faces)
+    assert np.allclose(csx_export.read_binary_stl(stl_file), vertices[faces], atol=1e-6), "STL differs"
+
+    print(f"sphere with {len(vertices)} vertices, {len(faces)} triangles, best of {repeat}")
+    print(f"{'':28s} {'export':>8s} {'xml':>8s}")
+    for name, path in (('ascii STL + reader', ascii_path),
+                       ('binary STL + reader', binary_path),
+                       ('in memory polyhedron', memory_path)):
+        best = None
+        for _ in range(repeat):
+            CSX = ContinuousStructure()
+            metal = CSX.AddMetal('bench')
+            time_start = time.time()
+            path(metal, vertices, faces, tmp_dir)
+            time_export = time.time() - time_start
+            # openEMS parses the scene back from xml, which includes inline polyhedrons
+            CSX.Write2XML(os.path.join(tmp_dir, 'bench.xml'))
+            time_xml = time.time() - time_start - time_export
+            if best is None or time_export + time_xml < sum(best):
+                best = (time_export, time_xml)
+        print(f"{name:28s} {best[0]:8.3f}s {best[1]:7.3f}s")
+
+if __name__ == "__main__":
+    subdivisions = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    bench(subdivisions, repeat)
@@ -10,6 +10,7 @@ rm -rf /tmp/IntuitionRF/__pycache__/
 rm -rf /tmp/IntuitionRF/operators/__pycache__/
 rm -rf /tmp/IntuitionRF/panels/__pycache__/
 rm -rf /tmp/IntuitionRF/images
+rm -rf /tmp/IntuitionRF/benchmarks
 rm -rf /tmp/IntuitionRF/*blend
 rm -rf /tmp/IntuitionRF/*blend1
 rm -rf /tmp/IntuitionRF/.git
@@ -3,239 +3,864 @@ import sys
 from unittest.mock import MagicMock
 
 sys.modules['vtkmodules.vtkRenderingMatplotlib'] = MagicMock()
-import vtk
-from vtk.util.numpy_support import vtk_to_numpy
 import numpy as np
 import scipy
 import pyopenvdb as vdb
-from scipy.interpolate import RegularGridInterpolator
-from scipy.ndimage import convolve, gaussian_filter
+from scipy.ndimage import correlate1d
 import glob
 import threading
 import time 
 import multiprocessing
 import os
+import json
+import re
+import mmap
+import struct
+import zlib
+from collections import namedtuple
+
+VTK_TYPES = {
+    'Int8': 'i1', 'UInt8': 'u1', 'Int16': 'i2', 'UInt16': 'u2',
+    'Int32': 'i4', 'UInt32': 'u4', 'Int64': 'i8', 'UInt64': 'u8',
+    'Float32': 'f4', 'Float64': 'f8',
+}
+
+def xml_attributes(tag):
+    """Attributes of a single xml tag as a dict"""
+    return dict(re.findall(r'(\w+)="([^"]*)"', tag))
+
+def read_vtr_native(vtr_file, array=0):
+    """Read a rectilinear grid dump written with raw appended data, without vtk.
+    The arrays are views into a memory map of the file, nothing is copied until 
+    they are used. Raises ValueError for anything else (compressed, inline, 
+    base64, multi piece), read_vtr falls back to vtk for those"""
+    with open(vtr_file, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    marker = mm.find(b'<AppendedData')
+    if marker < 0:
+        raise ValueError(f"{vtr_file}: no appended data")
+    data_start = mm.find(b'_', marker) + 1
+    header = mm[:data_start].decode('ascii', errors='replace')
+
+    file_tag = xml_attributes(re.search(r'<VTKFile[^>]*>', header).group(0))
+    if file_tag.get('type') != 'RectilinearGrid' or 'compressor' in file_tag:
+        raise ValueError(f"{vtr_file}: unsupported VTKFile {file_tag}")
+    if xml_attributes(re.search(r'<AppendedData[^>]*>', header).group(0)).get('encoding') != 'raw':
+        raise ValueError(f"{vtr_file}: appended data is not raw")
+    if header.count('<Piece') != 1:
+        raise ValueError(f"{vtr_file}: expected a single piece")
+
+    endian = '<' if file_tag.get('byte_order', 'LittleEndian') == 'LittleEndian' else '>'
+    # version 0.1 files have 32 bits block sizes unless told otherwise
+    size_type = np.dtype(endian + VTK_TYPES[file_tag.get('header_type', 'UInt32')])
+
+    def read_array(tag):
+        attributes = xml_attributes(tag)
+        if attributes.get('format') != 'appended':
+            raise ValueError(f"{vtr_file}: array {attributes.get('Name')} is not appended")
+        offset = data_start + int(attributes['offset'])
+        size = int(np.frombuffer(mm, size_type, 1, offset)[0])
+        dtype = np.dtype(endian + VTK_TYPES[attributes['type']])
+        return np.frombuffer(mm, dtype, size // dtype.itemsize, offset + size_type.itemsize)
+
+    point_section = re.search(r'<PointData[^>]*>(.*?)</PointData>', header, re.S)
+    point_tags = re.findall(r'<DataArray[^>]*>', point_section.group(1)) if point_section else []
+    coordinates = re.search(r'<Coordinates>(.*?)</Coordinates>', header, re.S)
+    axis_tags = re.findall(r'<DataArray[^>]*>', coordinates.group(1)) if coordinates else []
+    if not point_tags or len(axis_tags) != 3:
+        raise ValueError(f"{vtr_file}: missing point data or coordinates")
+
+    axes = tuple(read_array(tag) for tag in axis_tags)
+
+    point_data = read_array(point_tags[array])
+    # x varies fastest in the file
+    point_data = point_data.reshape(len(axes[2]), len(axes[1]), len(axes[0]), -1)
+    point_data = point_data.transpose(2, 1, 0, 3)
+
+    return axes, point_data
+
+def read_vtr_vtk(vtr_file, array=0):
+    """Read a rectilinear grid dump through vtk. Handles every flavour of vtr 
+    but copies everything and needs vtk in the process"""
+    import vtk
+    from vtk.util.numpy_support import vtk_to_numpy
 
-def vtr_to_vdb(vtr_file, vdb_file, dicing_factor=8):
-    # read input data
     reader = vtk.vtkXMLRectilinearGridReader()
     reader.SetFileName(vtr_file)
     reader.Update()
 
     output = reader.GetOutput()
 
-    point_data = output.GetPointData()
-    a0 = point_data.GetArray(0)
-    points = vtk.vtkPoints()
-    output.GetPoints(points)
-
-    point_data = vtk_to_numpy(a0)
-    point_data_magnitude = np.linalg.norm(point_data, axis=1)
-    points = vtk_to_numpy(points.GetData())
-
-
-    # get irregular grid axes
-    points_x = points[:,0]
-    points_y = points[:,1]
-    points_z = points[:,2]
-
-    # get the offset for the grid
-    offset_x = np.min(points_x)
-    offset_y = np.min(points_y)
-    offset_z = np.min(points_z)
-
-    # get the spacing of the axes
-    dx  = np.diff(points_x)
-    dy  = np.diff(points_y)
-    dz  = np.diff(points_z)
-
-    # non-zero spacing
-    dx = dx[dx != 0]
-    dy = dy[dy != 0]
-    dz = dz[dz != 0]
+    # the rectilinear grid stores its axes directly, no need to build every point
+    axes = (
+        vtk_to_numpy(output.GetXCoordinates()),
+        vtk_to_numpy(output.GetYCoordinates()),
+        vtk_to_numpy(output.GetZCoordinates()),
+    )
+
+    point_data = vtk_to_numpy(output.GetPointData().GetArray(array))
+    # x varies fastest in the file
+    point_data = point_data.reshape(len(axes[2]), len(axes[1]), len(axes[0]), -1)
+    point_data = point_data.transpose(2, 1, 0, 3)
+
+    return axes, point_data
+
+def read_vtr(vtr_file, array=0):
+    """Read a rectilinear grid dump. Returns the (x, y, z) axes and the point array 
+    of the given index indexed [x][y][z][component]. Raw appended data is memory mapped directly, 
+    anything else goes through vtk"""
+    try:
+        return read_vtr_native(vtr_file, array)
+    except (ValueError, KeyError, AttributeError, IndexError):
+        return read_vtr_vtk(vtr_file, array)
+
+# a frame of an openEMS HDF5 dump: every timestep is a dataset of the same file
+H5Frame = namedtuple('H5Frame', ['file', 'dataset'])
+
+H5_TD_GROUP = '/FieldData/TD'
+
+def read_h5_mesh(h5_file):
+    """(x, y, z) axes of an openEMS HDF5 dump, shared by all of its frames"""
+    import h5py
+
+    with h5py.File(h5_file, 'r') as f:
+        mesh = f['/Mesh']
+        if not all(name in mesh for name in ('x', 'y', 'z')):
+            raise ValueError(f"{h5_file}: only cartesian meshes are supported")
+        return tuple(mesh[name][()] for name in ('x', 'y', 'z'))
+
+def h5_frames(h5_file):
+    """Time domain frames of an openEMS HDF5 dump ordered by timestep, the datasets 
+    are named after their timestep number"""
+    import h5py
+
+    if not os.path.exists(h5_file):
+        return []
+    with h5py.File(h5_file, 'r') as f:
+        if H5_TD_GROUP not in f:
+            return []
+        names = sorted(f[H5_TD_GROUP].keys(), key=int)
+    return [H5Frame(h5_file, f"{H5_TD_GROUP}/{name}") for name in names]
+
+class H5FieldData:
+    """Field of an HDF5 frame, read on demand. openEMS stores vector fields as 
+    [component][z][y][x]; indexing with [x][y][z](component) like the vtr point 
+    data only reads the hyperslab of the x, y and z ranges asked for, so slabs and 
+    slices stream from the file chunk by chunk instead of loading the whole frame"""
+
+    def __init__(self, h5_file, dataset, axes):
+        self.file = h5_file
+        self.dataset = dataset
+        self.shape = tuple(len(axis) for axis in axes) + (3,)
+        self.ndim = 4
+
+    def __getitem__(self, key):
+        import h5py
+
+        key = key if isinstance(key, tuple) else (key,)
+        # ranges are read from the file, anything else is applied once read
+        ranges = [slice(None)] * 3
+        for axis in range(min(len(key), 3)):
+            if isinstance(key[axis], slice):
+                ranges[axis] = key[axis]
+                key = key[:axis] + (slice(None),) + key[axis + 1:]
+        x, y, z = ranges
+
+        # read only, so any number of workers can read the same file at once
+        with h5py.File(self.file, 'r') as f:
+            data = f[self.dataset][:, z, y, x]
+        return data.transpose(3, 2, 1, 0)[key]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:, :, :]
+        return data if dtype is None else data.astype(dtype)
+
+def read_h5_frame(frame, axes=None):
+    """Axes and lazily read field data of an HDF5 frame. Pass the axes when they 
+    are already known to skip reading the mesh again"""
+    if axes is None:
+        axes = read_h5_mesh(frame.file)
+    return axes, H5FieldData(frame.file, frame.dataset, axes)
+
+# a phase step of a frequency domain dump: the field at phase (radians) along one 
+# period, from the file's phasor (dataset is the h5 phasor, None for a vtr file)
+PhasorFrame = namedtuple('PhasorFrame', ['file', 'dataset', 'phase'])
+
+H5_FD_GROUP = '/FieldData/FD'
+
+def phasor_frames(fd_file, phase_steps, dataset=None):
+    """phase_steps frames evenly spread over one period of the phasor in fd_file"""
+    return [PhasorFrame(fd_file, dataset, 2 * np.pi * step / phase_steps) for step in range(phase_steps)]
+
+def vtr_phasor_frames(prefix, phase_steps):
+    """Frames of the first frequency of a vtr frequency domain dump, openEMS writes 
+    one {prefix}_f={frequency}.vtr file per frequency"""
+    files = sorted(glob.glob(f"{prefix}_f=*.vtr"), key=lambda f: float(f.rsplit('=', 1)[1][:-4]))
+    if len(files) == 0:
+        return []
+    return phasor_frames(files[0], phase_steps)
+
+def h5_phasor_frames(h5_file, phase_steps):
+    """Frames of the first frequency of an HDF5 frequency domain dump, stored as the 
+    f0_real and f0_imag datasets"""
+    import h5py
+
+    if not os.path.exists(h5_file):
+        return []
+    with h5py.File(h5_file, 'r') as f:
+        if f"{H5_FD_GROUP}/f0_real" not in f:
+            return []
+    return phasor_frames(h5_file, phase_steps, f"{H5_FD_GROUP}/f0")
+
+class PhasorFieldData:
+    """Instantaneous field Re{(real + j imag) e^{j phase}} of a phasor. Computed on 
+    the slices asked for, so a lazily read phasor is still read slab by slab"""
+
+    def __init__(self, real, imag, phase):
+        self.real = real
+        self.imag = imag
+        self.phase = phase
+        self.shape = real.shape
+        self.ndim = real.ndim
+
+    def __getitem__(self, key):
+        return np.asarray(self.real[key]) * np.cos(self.phase) - \
+            np.asarray(self.imag[key]) * np.sin(self.phase)
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:, :, :]
+        return data if dtype is None else data.astype(dtype)
+
+def read_phasor_frame(frame, axes=None):
+    """Axes and field data at the frame's phase of a frequency domain dump"""
+    if frame.dataset is None:
+        # openEMS writes the real part first, then the imaginary one
+        axes, real = read_vtr(frame.file, 0)
+        _, imag = read_vtr(frame.file, 1)
+    else:
+        if axes is None:
+            axes = read_h5_mesh(frame.file)
+        real = H5FieldData(frame.file, f"{frame.dataset}_real", axes)
+        imag = H5FieldData(frame.file, f"{frame.dataset}_imag", axes)
+    return axes, PhasorFieldData(real, imag, frame.phase)
+
+def read_frame(frame, axes=None):
+    """Axes and [x][y][z][component] field data of a frame, either a vtr file, an 
+    H5Frame or a PhasorFrame. Pass the axes when they are already known to skip 
+    reading the mesh of frames stored without it"""
+    if isinstance(frame, PhasorFrame):
+        return read_phasor_frame(frame, axes)
+    if isinstance(frame, H5Frame):
+        return read_h5_frame(frame, axes)
+    return read_vtr(frame)
+
+def frame_path(frame):
+    """File holding a frame"""
+    if isinstance(frame, (H5Frame, PhasorFrame)):
+        return frame.file
+    return frame
+
+def frame_name(frame):
+    """Name identifying a frame in the manifest and statistics cache"""
+    if isinstance(frame, PhasorFrame):
+        return f"{os.path.basename(frame.file)}{frame.dataset or ''}@{np.degrees(frame.phase):.3f}"
+    if isinstance(frame, H5Frame):
+        return f"{os.path.basename(frame.file)}{frame.dataset}"
+    return os.path.basename(frame)
+
+def axis_weights(axis, grid):
+    """Index of the lower bracketing line in axis and the linear interpolation 
+    weight of the upper one for each position of grid. A flat axis (a single line) 
+    always picks that line, the upper one then being clipped to it"""
+    if len(axis) < 2:
+        return np.zeros(len(grid), dtype=np.intp), np.zeros(len(grid))
+    index = np.searchsorted(axis, grid, side='right') - 1
+    index = np.clip(index, 0, len(axis) - 2)
+    weight = (grid - axis[index]) / (axis[index + 1] - axis[index])
+    return index, np.clip(weight, 0, 1)
+
+def plan_cell_size(axes, dicing_factor=8, voxel_budget=None):
+    """Cell size of the regular grid. By default dicing_factor times the smallest 
+    cell of the dump, with a voxel_budget the smallest size keeping the grid under 
+    that many voxels whatever the dump's finest cell"""
+    # flat axes (2D dumps) get a single plane whatever the cell size, see grid_shape
+    axes = [axis for axis in axes if np.max(axis) > np.min(axis)]
+    if len(axes) == 0:
+        # a single point, any size does
+        return 1.0
+
+    if voxel_budget:
+        extents = [np.max(axis) - np.min(axis) for axis in axes]
+        return float((np.prod(extents) / voxel_budget) ** (1 / len(extents)))
 
     # get the smallest cell-dimension in the grid
-    minx = np.min(np.abs(dx))
-    miny = np.min(np.abs(dy))
-    minz = np.min(np.abs(dz))
-    cell_size = min(minx, miny, minz)
+    cell_size = min(np.min(np.diff(axis)) for axis in axes)
 
     # artificially force cell size up to reduce interpolation time
-    cell_size *= dicing_factor
-
-    # irregular grid
-    grid_dim_x = int((np.max(points_x) - np.min(points_x)) / cell_size)
-    grid_dim_y = int((np.max(points_y) - np.min(points_y)) / cell_size)
-    grid_dim_z = int((np.max(points_z) - np.min(points_z)) / cell_size)
-
-    grid_x = np.linspace(np.min(points_x), np.max(points_x), grid_dim_x)
-    grid_y = np.linspace(np.min(points_y), np.max(points_y), grid_dim_y)
-    grid_z = np.linspace(np.min(points_z), np.max(points_z), grid_dim_z)
-
-    # Create an interpolator
-    ux = np.unique(points_x)
-    uy = np.unique(points_y)
-    uz = np.unique(points_z)
-    # this is the correct input data
-    point_data_magnitude = point_data_magnitude.reshape(len(uz), len(uy), len(ux)).T
-    interpolator = RegularGridInterpolator((ux, uy, uz), point_data_magnitude)
-
-    # Generate the regular grid for interpolation
-    regular_points = np.array(np.meshgrid(grid_x, grid_y, grid_z, indexing='ij')).T
-    regular_points = regular_points.reshape(-1, 3)
-
-    # Interpolation
-    interpolated_values = interpolator(regular_points)
-    #print('\ninterpolation complete')
-    #print(f"{interpolated_values.shape=}")
-
-    # check if there is NaN values in the array
-
-    # Reshape result
-    interpolated_volume = interpolated_values.reshape(len(grid_z), len(grid_y), len(grid_x)).T
-    
+    return cell_size * dicing_factor
+
+def grid_shape(axes, cell_size):
+    """Dimensions of the regular grid covering axes at cell_size, at least one plane 
+    along each axis"""
+    return tuple(max(int((np.max(axis) - np.min(axis)) / cell_size), 1) for axis in axes)
+
+class ResamplingPlan:
+    """Resampling of a dump box's rectilinear grid onto a regular grid. 
+
+    Every frame of a dump box shares the same rectilinear grid, so the bracketing 
+    lines and weights are computed once and reused for each frame's data. 
+    Interpolation is (tri)linear, applied as one separable gather per axis"""
+
+    def __init__(self, axes, dicing_factor=8, voxel_budget=None):
+        # get the offset for the grid
+        self.offset = tuple(float(np.min(axis)) for axis in axes)
+
+        cell_size = plan_cell_size(axes, dicing_factor, voxel_budget)
+        self.cell_size = cell_size
+        self.scale_factor = 1 / cell_size
+
+        # regular grid
+        self.grid = []
+        self.weights = []
+        for axis, grid_dim in zip(axes, grid_shape(axes, cell_size)):
+            grid = np.linspace(np.min(axis), np.max(axis), grid_dim)
+            self.grid.append(grid)
+            self.weights.append(axis_weights(axis, grid))
+
+        self.shape = tuple(len(grid) for grid in self.grid)
+        self.source_shape = tuple(len(axis) for axis in axes)
+        # kept (as copies, the axes may be views into a mapped file) so frames 
+        # stored without their mesh can be read with the plan alone
+        self.axes = tuple(np.array(axis) for axis in axes)
+
+    @classmethod
+    def from_frame(cls, frame, dicing_factor=8, voxel_budget=None):
+        axes, _ = read_frame(frame)
+        return cls(axes, dicing_factor, voxel_budget)
+
+    def source_z_range(self, z_start=0, z_stop=None):
+        """Range of source z lines needed to resample the z_start:z_stop planes"""
+        index = self.weights[2][0][z_start:z_stop]
+        return int(np.min(index)), int(np.max(index)) + 2
+
+    def apply(self, volume, z_start=0, z_stop=None):
+        """Resample a [x][y][z](...) indexed volume onto the z_start:z_stop planes of 
+        the regular grid. volume may be cropped to source_z_range(z_start, z_stop)"""
+        source_z_start, _ = self.source_z_range(z_start, z_stop)
+        weights = list(self.weights)
+        index, weight = weights[2]
+        weights[2] = (index[z_start:z_stop] - source_z_start, weight[z_start:z_stop])
+
+        # z first so a slab never holds more than its own planes
+        for axis in (2, 0, 1):
+            index, weight = weights[axis]
+            shape = [1] * volume.ndim
+            shape[axis] = -1
+            weight = weight.reshape(shape)
+            volume = np.take(volume, index, axis=axis) * (1 - weight) + \
+                np.take(volume, index + 1, axis=axis, mode='clip') * weight
+        return volume
+
+    def slab_depth(self, memory_budget=None):
+        """Number of z planes to process at once to stay under memory_budget bytes"""
+        if not memory_budget:
+            return self.shape[2]
+
+        # source data is resampled along z first, then x, then y
+        plane_bytes = 8 * self.source_shape[0] * self.source_shape[1] + \
+            8 * self.shape[0] * self.source_shape[1] + \
+            BYTES_PER_VOXEL * self.shape[0] * self.shape[1]
+        depth = memory_budget // plane_bytes - 2 * SLAB_HALO
+        return int(np.clip(depth, 1, self.shape[2]))
+
+# planes of context needed on each side of a slab by the gradient kernels
+SLAB_HALO = 1
+# rough peak memory per output voxel while processing a slab: the float64 volume, 
+# its float32 copy, the gradients, filter temporaries and the float32 copies 
+# handed to the grids
+BYTES_PER_VOXEL = 64
+
+# every grid a conversion can produce, in output order
+GRID_NAMES = ('magnitude', 'sobel', 'sobel_x', 'sobel_y', 'sobel_z', 
+              'field_x', 'field_y', 'field_z', 'energy_density')
+# field component index each component grid holds
+COMPONENT_GRIDS = {'field_x': 0, 'field_y': 1, 'field_z': 2}
+# axis of the [x][y][z] volume each gradient grid derives along 
+# (kept from the original dense kernels naming)
+GRADIENT_AXES = {'sobel_x': 2, 'sobel_y': 1, 'sobel_z': 0}
+
+# grids on the log normalised [0, 1] scale of the magnitude
+NORMALISED_GRIDS = ('magnitude', 'sobel', 'sobel_x', 'sobel_y', 'sobel_z')
+
+def grid_tolerance(name, sparse_threshold, use_log=True):
+    """Distance to the background under which voxels of a grid are left inactive. 
+    sparse_threshold is on the normalised scale, so it only applies to the grids 
+    derived from the log magnitude: the field components and energy density keep 
+    their physical units (an energy density is around 1e-6) and only leave the 
+    voxels exactly at the background inactive"""
+    if sparse_threshold is None or not use_log or name not in NORMALISED_GRIDS:
+        return 0
+    return sparse_threshold
+
+def needs_gradients(grids):
+    return 'sobel' in grids or any(name in GRADIENT_AXES for name in grids)
+
+def sobel_gradient(volume, axis):
+    """Absolute 3x3x3 sobel-like derivative of volume along axis, as 1D passes. 
+
+    The kernel is a [-1, 0, 1] derivative along axis times w = [[1,3,1],[3,6,3],[1,3,1]] 
+    over the other two axes. w is not separable by itself but is s*s - 3 * delta*delta 
+    with s = [1, 3, 1], so the dense convolution becomes a derivative, two smoothing 
+    passes and a difference"""
+    derivative = correlate1d(volume, [1, 0, -1], axis=axis, mode='reflect')
+    others = [other for other in range(3) if other != axis]
+    smoothed = correlate1d(derivative, [1, 3, 1], axis=others[0], mode='reflect')
+    gradient = correlate1d(smoothed, [1, 3, 1], axis=others[1], mode='reflect')
+    derivative *= 3
+    gradient -= derivative
+    return np.abs(gradient, out=gradient)
+
+def field_volumes(interpolated_volume, grids=('magnitude',), components=None, energy_coefficient=.5, 
+                  use_log=True, log_offset=15, log_scale=.01):
+    """Compute the requested output volumes from the resampled field magnitude 
+    (and components, by index, for the component grids), returns them by grid name"""
+    volumes = {}
+    for name, index in COMPONENT_GRIDS.items():
+        if name in grids:
+            volumes[name] = components[index]
+
+    # energy density is 1/2 eps0 |E|^2 or 1/2 mu0 |H|^2, before any log scaling
+    if 'energy_density' in grids:
+        volumes['energy_density'] = energy_coefficient * interpolated_volume**2
+
     # log view of the output because of massive scale between min and max values
-    do_log = 1
-    if do_log:
+    if use_log:
         interpolated_volume = np.log(interpolated_volume, 
                                     out=np.zeros_like(interpolated_volume), 
                                     where=interpolated_volume!=0)
-        # need to add the minimimum to the log'd values because otherwise we get negative attributes
-        # from values <1 pre-log
-        # need the minimum accross all frames
-        min_value = 15
-        #print(f"{min_value=}")
-        interpolated_volume[interpolated_volume != 0] += min_value
+        # need to add an offset to the log'd values because otherwise we get negative attributes
+        # from values <1 pre-log. Defaults are a fixed guess, sequence_normalization 
+        # derives them from the statistics of all frames
+        interpolated_volume[interpolated_volume != 0] += log_offset
         # remove negative values all together
         interpolated_volume[interpolated_volume < 0] = 0 
         # reduce the total output range
-        interpolated_volume *= .01 
-
-    # now we add a peak detection using sobel filtering 
-    # filters kernels
-    # this largely came from ChatGPT
-    sobel_x = np.array([[[1, 0, -1], [2, 0, -2], [1, 0, -1]],
-                        [[2, 0, -2], [4, 0, -4], [2, 0, -2]],
-                        [[1, 0, -1], [2, 0, -2], [1, 0, -1]]])
-    sobel_y = np.array([[[1, 2, 1], [0, 0, 0], [-1, -2, -1]],
-                        [[2, 4, 2], [0, 0, 0], [-2, -4, -2]],
-                        [[1, 2, 1], [0, 0, 0], [-1, -2, -1]]])
-    sobel_z = np.array([[[1, 2, 1], [2, 4, 2], [1, 2, 1]],
-                        [[0, 0, 0], [0, 0, 0], [0, 0, 0]],
-                        [[-1, -2, -1], [-2, -4, -2], [-1, -2, -1]]])
-
-    sobel_x = np.array([
-        [[-1,  0,  1], [-3,  0,  3], [-1,  0,  1]],
-        [[-3,  0,  3], [-6,  0,  6], [-3,  0,  3]],
-        [[-1,  0,  1], [-3,  0,  3], [-1,  0,  1]]
-    ])
+        interpolated_volume *= log_scale
 
-    sobel_y = np.array([
-        [[-1, -3, -1], [ 0,  0,  0], [ 1,  3,  1]],
-        [[-3, -6, -3], [ 0,  0,  0], [ 3,  6,  3]],
-        [[-1, -3, -1], [ 0,  0,  0], [ 1,  3,  1]]
-    ])
+    volumes['magnitude'] = interpolated_volume
 
-    sobel_z = np.array([
-        [[-1, -3, -1], [-3, -6, -3], [-1, -3, -1]],
-        [[ 0,  0,  0], [ 0,  0,  0], [ 0,  0,  0]],
-        [[ 1,  3,  1], [ 3,  6,  3], [ 1,  3,  1]]
-    ])
+    # gradients for edge/peak highlighting, only the requested ones
+    if needs_gradients(grids):
+        # the grids are float32 anyway, halves the memory traffic of the filter passes
+        volume = interpolated_volume.astype(np.float32)
+        for name, axis in GRADIENT_AXES.items():
+            if name in grids or 'sobel' in grids:
+                volumes[name] = sobel_gradient(volume, axis)
+
+        if 'sobel' in grids:
+            volumes['sobel'] = volumes['sobel_x'] + volumes['sobel_y'] + volumes['sobel_z']
+
+    return {name: volumes[name] for name in GRID_NAMES if name in grids}
+
+def vtr_to_vdb(vtr_file, vdb_file, dicing_factor=8, plan=None, memory_budget=None, grids=('magnitude',), 
+               voxel_budget=None, energy_coefficient=.5, sparse_threshold=None, background=0.0, prune=False, 
+               lod_factors=(), half_float=False, use_log=True, log_offset=15, log_scale=.01, stats=None):
+    """Convert a dump frame (vtr file or H5Frame) into a vdb file holding the requested grids. With a 
+    memory_budget (bytes) the regular grid is processed in z slabs written 
+    straight into the grids, so peak memory does not grow with the output volume. 
 
+    With a sparse_threshold, voxels of the log normalised grids within the threshold 
+    of the background value are left inactive (and optionally pruned into tiles) 
+    instead of being stored, see grid_tolerance. 
 
-    #interpolated_volume_smoothed = gaussian_filter(interpolated_volume, sigma=10, radius=25)
-    interpolated_volume_smoothed = interpolated_volume
+    The size and write time of the output files are printed, and stored in the 
+    stats dict when one is given along with the active voxel ratio of each grid 
+    (sparse conversions only)"""
+    # read input data
+    # with a plan, frames stored without their mesh only have their field read
+    axes, point_data = read_frame(vtr_file, None if plan is None else plan.axes)
+
+    # a plan shared accross frames skips the whole grid setup
+    if plan is None:
+        plan = ResamplingPlan(axes, dicing_factor, voxel_budget)
+
+    print(f"scale_factor = {plan.scale_factor} ( scale down by a factor of {plan.cell_size})")
+
+    # only the gradient kernels need context from neighbouring slabs
+    halo = SLAB_HALO if needs_gradients(grids) else 0
+
+    vdb_grids = {}
+    # preview levels, written next to vdb_file
+    lod_grids = {factor: {} for factor in lod_factors}
+    depth = plan.slab_depth(memory_budget)
+    if len(lod_factors) > 0 and depth < plan.shape[2]:
+        # slabs start on a block of every level so no block straddles two slabs
+        step = int(np.lcm.reduce(lod_factors))
+        depth = max(step, depth // step * step)
+    for z_start in range(0, plan.shape[2], depth):
+        z_stop = min(z_start + depth, plan.shape[2])
+        # slabs overlap their neighbours by the halo so the gradients at the seams 
+        # match the ones of the whole volume
+        halo_start = max(z_start - halo, 0)
+        halo_stop = min(z_stop + halo, plan.shape[2])
+
+        source_z_start, source_z_stop = plan.source_z_range(halo_start, halo_stop)
+        source = point_data[:, :, source_z_start:source_z_stop]
+        point_data_magnitude = np.linalg.norm(source, axis=-1)
+        interpolated_volume = plan.apply(point_data_magnitude, halo_start, halo_stop)
+
+        # only resample the components that are written out
+        components = {index: plan.apply(source[..., index], halo_start, halo_stop) 
+                      for name, index in COMPONENT_GRIDS.items() if name in grids}
+
+        core = slice(z_start - halo_start, z_stop - halo_start)
+        volumes = field_volumes(interpolated_volume, grids, components, energy_coefficient, 
+                                use_log, log_offset, log_scale)
+        for name, volume in volumes.items():
+            if name not in vdb_grids:
+                vdb_grids[name] = new_grid(name, background)
+            tolerance = grid_tolerance(name, sparse_threshold, use_log)
+            copy_to_grid(vdb_grids[name], volume[:, :, core], (0, 0, z_start), tolerance)
+            for factor in lod_factors:
+                if name not in lod_grids[factor]:
+                    lod_grids[factor][name] = new_lod_grid(name, factor, background)
+                copy_to_grid(lod_grids[factor][name], downsample(volume[:, :, core], factor), 
+                             (0, 0, z_start // factor), tolerance)
+
+    active_ratio = {}
+    if sparse_threshold is not None:
+        voxel_count = plan.shape[0] * plan.shape[1] * plan.shape[2]
+        for name, grid in vdb_grids.items():
+            if prune:
+                grid.prune(grid_tolerance(name, sparse_threshold, use_log))
+            active_ratio[name] = grid.activeVoxelCount() / voxel_count
+        if prune:
+            for grids_lod in lod_grids.values():
+                for name, grid in grids_lod.items():
+                    grid.prune(grid_tolerance(name, sparse_threshold, use_log))
+
+    write_seconds, write_bytes = write_grids(vdb_file, vdb_grids.values(), half_float)
+    for factor, grids_lod in lod_grids.items():
+        seconds, size = write_grids(lod_filename(vdb_file, factor), grids_lod.values(), half_float)
+        write_seconds += seconds
+        write_bytes += size
+    print(f"{os.path.basename(vdb_file)}: {write_bytes / 1024**2:.1f} MB written in {write_seconds:.2f}s")
+    if stats is not None:
+        stats['write_seconds'] = write_seconds
+        stats['write_bytes'] = write_bytes
+        stats['active_ratio'] = active_ratio
+
+    return plan.scale_factor, plan.offset
+
+def write_grids(vdb_file, grids, half_float=False):
+    """Write grids to vdb_file, as 16 bit floats with half_float. Returns the write 
+    time and file size. pyopenvdb has no codec setting, files are compressed with 
+    the library's default (blosc when built with it, zip otherwise)"""
+    grids = list(grids)
+    for grid in grids:
+        grid.saveFloatAsHalf = half_float
+    time_start = time.time()
+    vdb.write(vdb_file, grids=grids)
+    return time.time() - time_start, os.path.getsize(vdb_file)
+
+def new_grid(name, background=0.0):
+    grid = vdb.FloatGrid(background)
+    grid.name = name
+    return grid
+
+def new_lod_grid(name, factor, background=0.0):
+    """Grid of a preview level: each voxel is a factor^3 block of the full resolution 
+    grid, the transform puts it over the block's center so both levels line up"""
+    grid = new_grid(name, background)
+    center = (factor - 1) / 2
+    grid.transform = vdb.createLinearTransform([
+        [factor, 0, 0, 0],
+        [0, factor, 0, 0],
+        [0, 0, factor, 0],
+        [center, center, center, 1],
+    ])
+    return grid
+
+def downsample(volume, factor):
+    """Mean of each factor^3 block of a [x][y][z] volume, incomplete blocks at the 
+    upper ends are dropped"""
+    nx, ny, nz = (size // factor for size in volume.shape)
+    volume = volume[:nx * factor, :ny * factor, :nz * factor]
+    return volume.reshape(nx, factor, ny, factor, nz, factor).mean(axis=(1, 3, 5))
+
+def lod_filename(file_vdb, factor=1):
+    """File of a frame's preview level downsampled by factor, from any level's file 
+    (factor 1 is the full resolution one)"""
+    base, index = re.match(r'(.*?)(?:_lod\d+)?(_\d+)?\.vdb$', file_vdb).groups()
+    lod = f"_lod{factor}" if factor > 1 else ""
+    return f"{base}{lod}{index or ''}.vdb"
+
+def copy_to_grid(grid, volume, ijk=(0, 0, 0), tolerance=0):
+    """Bulk copy a [x][y][z] indexed numpy volume into grid, starting at voxel ijk. 
+    Voxels within tolerance of the grid's background are left inactive"""
+    volume = np.ascontiguousarray(volume, dtype=np.float32)
+    if tolerance > 0:
+        # inactive voxels read back as the background, make sure that is what they hold. 
+        # Snapped into a new array, volume may be the caller's own and still be 
+        # downsampled for the preview levels
+        volume = np.where(np.abs(volume - grid.background) <= tolerance, 
+                          np.float32(grid.background), volume)
+    # a single copyFromArray call replaces one setValueOn per voxel, array index 
+    # (i, j, k) lands on voxel ijk + (i, j, k). Voxels exactly equal to the 
+    # background are left inactive, which samples the same
+    grid.copyFromArray(volume, ijk=ijk, tolerance=tolerance)
+
+def volume_to_grid(volume, name):
+    """Bulk copy a [x][y][z] indexed numpy volume into a new named FloatGrid"""
+    grid = new_grid(name)
+    copy_to_grid(grid, volume)
+    return grid
+
+# log10 magnitude bins of the sequence statistics histogram, wide enough for any field dump
+STATISTICS_BINS = np.linspace(-30, 30, 1201)
+
+def vtr_statistics(vtr_file):
+    """Min, max and log10 histogram of the non-zero field magnitude of a dump"""
+    _, point_data = read_frame(vtr_file)
+    magnitude = np.linalg.norm(point_data[:, :, :], axis=-1)
+    magnitude = magnitude[magnitude > 0]
+    histogram, _ = np.histogram(np.log10(magnitude), bins=STATISTICS_BINS)
+    if len(magnitude) == 0:
+        return None, None, histogram
+    return float(np.min(magnitude)), float(np.max(magnitude)), histogram
+
+def statistics_key(files):
+    return [[frame_name(f), os.path.getsize(frame_path(f)), os.path.getmtime(frame_path(f))] for f in files]
+
+def cached_statistics(files, cache_file):
+    """Statistics of files saved in cache_file, None unless the files are unchanged since"""
+    if not os.path.exists(cache_file):
+        return None
+    with open(cache_file) as f:
+        cached = json.load(f)
+    if cached['files'] != statistics_key(files):
+        return None
+    return cached['statistics']
+
+def save_statistics(files, cache_file, statistics):
+    with open(cache_file, 'w') as f:
+        json.dump({'files': statistics_key(files), 'statistics': statistics}, f)
+
+def merge_statistics(results):
+    """Statistics of a whole sequence from the vtr_statistics of its frames, in any order"""
+    minimums = [minimum for minimum, _, _ in results if minimum is not None]
+    maximums = [maximum for _, maximum, _ in results if maximum is not None]
+    return {
+        'min': min(minimums) if len(minimums) > 0 else None,
+        'max': max(maximums) if len(maximums) > 0 else None,
+        'histogram': np.sum([histogram for _, _, histogram in results], axis=0).tolist(),
+    }
+
+def sequence_statistics(files, thread_count, cache_file=None):
+    """Magnitude statistics accross all frames of a dump box, computed in parallel. 
+    Cached in cache_file, which stays valid as long as the files are unchanged"""
+    if cache_file is not None:
+        statistics = cached_statistics(files, cache_file)
+        if statistics is not None:
+            return statistics
+
+    statistics = merge_statistics(pool_map(vtr_statistics, files, thread_count))
+    if cache_file is not None:
+        save_statistics(files, cache_file, statistics)
+    return statistics
+
+def statistics_percentile(statistics, percentile):
+    """log10 of the magnitude at the given percentile, from the statistics histogram"""
+    cumulative = np.cumsum(statistics['histogram'])
+    index = np.searchsorted(cumulative, cumulative[-1] * percentile / 100)
+    return STATISTICS_BINS[min(index, len(STATISTICS_BINS) - 1)]
+
+def sequence_normalization(statistics, percentile=1.0):
+    """log_offset and log_scale mapping the magnitudes between the given percentile 
+    and the maximum of a whole sequence onto [0, 1], lower values are clamped to 0"""
+    if statistics['max'] is None:
+        return {}
+
+    low = np.log(10) * max(statistics_percentile(statistics, percentile), np.log10(statistics['min']))
+    high = np.log(statistics['max'])
+    return {
+        'log_offset': float(-low),
+        'log_scale': float(1 / (high - low)) if high > low else 1.0,
+    }
+
+# conversion workers live as long as the addon, so each one pays for starting an 
+# interpreter, importing this module with numpy, scipy and pyopenvdb and, on spawn 
+# platforms, running the addon's __init__ and its bpy import probe only once instead 
+# of on every operator call. vtk is not part of it, read_vtr only imports it for the 
+# dumps the native reader can't handle. 
+# The pool is never resized: an operator may still have tasks queued on it, so each 
+# operator limits its own concurrency by how many tasks it keeps queued instead
+pool = None
+POOL_SIZE = multiprocessing.cpu_count()
+
+def warm_worker():
+    # runs once when a worker starts: unpickling it imports this (bpy free) module 
+    # and its dependencies up front rather than during the first conversion
+    np.linalg.norm(np.zeros((1, 3)), axis=-1)
+
+def get_pool():
+    """Pool of conversion workers shared by all operators, created on first use and 
+    kept until shutdown_pool"""
+    global pool
+    if pool is None:
+        pool = multiprocessing.Pool(processes=POOL_SIZE, initializer=warm_worker)
+    return pool
+
+def pool_map(func, items, thread_count):
+    """func over items on the shared pool, results in order, with at most 
+    thread_count items queued at once"""
+    pool = get_pool()
+    running = []
+    results = []
+    for item in items:
+        running.append(pool.apply_async(func, (item,)))
+        if len(running) >= max(thread_count, 1):
+            results.append(running.pop(0).get())
+    results += [result.get() for result in running]
+    return results
+
+def shutdown_pool():
+    """Stop the conversion workers (any conversion still running is cancelled)"""
+    global pool
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+        pool = None
+
+def convert_task(args):
+    """Convert a single frame, returns its index, output file, conversion time and 
+    output write stats"""
+    index, file_vtr, file_vdb, plan, options = args
+    time_start = time.time()
+    stats = {}
+    vtr_to_vdb(file_vtr, file_vdb, plan=plan, stats=stats, **options)
+    return index, file_vdb, time.time() - time_start, stats
+
+def vdb_filename(file_vtr, basename, index):
+    """Output file of a frame, named after the dump box and frame index"""
+    return os.path.join(os.path.dirname(frame_path(file_vtr)), f"{basename}_{index:06d}.vdb")
+
+def conversion_tasks(files, basename, plan, options, indices=None):
+    """One task per frame (or per frame in indices)"""
+    if indices is None:
+        indices = range(len(files))
+    return [(index, files[index], vdb_filename(files[index], basename, index), plan, options) for index in indices]
+
+def conversion_params(resolution, options):
+    """Everything that changes the output of a conversion, as stored in the manifest. 
+    resolution holds the ResamplingPlan arguments (dicing_factor or voxel_budget)"""
+    # round trip through json so tuples compare equal to the lists read back
+    return json.loads(json.dumps({**resolution, **options}))
+
+def load_manifest(manifest_file):
+    """Conversion manifest of a dump box: for each output file, the source file's 
+    size and modification time and the parameters it was converted with"""
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file) as f:
+        return json.load(f)
+
+def save_manifest(manifest_file, manifest):
+    # write then rename so an interrupted save never leaves a corrupt manifest
+    with open(f"{manifest_file}.tmp", 'w') as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_file}.tmp", manifest_file)
+
+def manifest_entry(file_vtr, params, plan):
+    return {
+        'source': frame_name(file_vtr),
+        'size': os.path.getsize(frame_path(file_vtr)),
+        'mtime': os.path.getmtime(frame_path(file_vtr)),
+        'params': params,
+        'scale_factor': plan.scale_factor,
+        'offset': list(plan.offset),
+    }
+
+def stale_frames(files, basename, manifest, params, indices=None):
+    """Indices of the frames (of all or the given indices) whose output is missing or 
+    was produced from another version of the source file or with other parameters"""
+    if indices is None:
+        indices = range(len(files))
+    stale = []
+    for index in indices:
+        file_vtr = files[index]
+        file_vdb = vdb_filename(file_vtr, basename, index)
+        entry = manifest.get(os.path.basename(file_vdb))
+        lod_files = [lod_filename(file_vdb, factor) for factor in params.get('lod_factors', ())]
+        if entry is None or not all(os.path.exists(f) for f in [file_vdb] + lod_files) or \
+                entry['source'] != frame_name(file_vtr) or \
+                entry['size'] != os.path.getsize(frame_path(file_vtr)) or \
+                entry['mtime'] != os.path.getmtime(frame_path(file_vtr)) or \
+                entry['params'] != params:
+            stale.append(index)
+    return stale
+
+def slice_plane(point_data, axes, axis, position, resolution=512):
+    """Field magnitude [u][v] on the plane at position along axis (0, 1, 2 for x, y, 
+    z), u and v being the two other axes in order. Resampled onto square pixels, 
+    resolution of them along the longest side of the plane"""
+    # the two source planes around the slice, magnitude first then interpolated 
+    # like the volumes are
+    index, weight = axis_weights(axes[axis], np.array([position]))
+    planes = [slice(None)] * 3
+    planes[axis] = slice(int(index[0]), int(index[0]) + 2)
+    magnitude = np.linalg.norm(point_data[tuple(planes)], axis=-1)
+    plane = np.take(magnitude, 0, axis=axis) * (1 - weight[0]) + np.take(magnitude, 1, axis=axis, mode='clip') * weight[0]
+
+    in_plane = [axes[other] for other in range(3) if other != axis]
+    pixel_size = max(np.max(a) - np.min(a) for a in in_plane) / resolution
+    for plane_axis, source in enumerate(in_plane):
+        grid = np.linspace(np.min(source), np.max(source), max(int((np.max(source) - np.min(source)) / pixel_size), 2))
+        index, weight = axis_weights(source, grid)
+        weight = weight.reshape((-1, 1) if plane_axis == 0 else (1, -1))
+        plane = np.take(plane, index, axis=plane_axis) * (1 - weight) + \
+            np.take(plane, index + 1, axis=plane_axis, mode='clip') * weight
+    return plane
+
+def colormap(values, lut):
+    """Colours of [0, 1] values through a (n, 4) uint8 lookup table"""
+    index = np.clip(values * (len(lut) - 1), 0, len(lut) - 1).astype(np.intp)
+    return lut[index]
+
+def write_png(png_file, rgba):
+    """Write a [row][column][rgba] uint8 image as an 8 bit RGBA png, first row on top"""
+    height, width, _ = rgba.shape
+    # every scanline starts with its filter type, 0 (none)
+    scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = rgba.reshape(height, -1)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(png_file, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+def slice_filename(frame, basename, axis, index):
+    """Image of a frame's slice, named after the dump box, slice axis and frame index"""
+    return os.path.join(os.path.dirname(frame_path(frame)), f"{basename}_slice_{'xyz'[axis]}_{index:06d}.png")
+
+def slice_task(args):
+    """Colour mapped slice of a single frame, returns its index, image file and time. 
+    options holds axis, position, resolution, lut and either the log normalization 
+    (use_log, log_offset, log_scale) or the linear scale's maximum"""
+    index, frame, png_file, axes, options = args
     time_start = time.time()
-    gradient_x = convolve(interpolated_volume_smoothed, sobel_x, mode='reflect')
-    gradient_y = convolve(interpolated_volume_smoothed, sobel_y, mode='reflect')
-    gradient_z = convolve(interpolated_volume_smoothed, sobel_z, mode='reflect')
-    gradient_x = np.abs(gradient_x)
-    gradient_y = np.abs(gradient_y)
-    gradient_z = np.abs(gradient_z)
-
-    peaks_x = np.zeros_like(interpolated_volume_smoothed, dtype=bool)
-    peaks_y = np.zeros_like(interpolated_volume_smoothed, dtype=bool)
-    peaks_z = np.zeros_like(interpolated_volume_smoothed, dtype=bool)
-
-    # remove first element, get positives, remove last element, get negatives
-    # were they are both true its a peak
-    peaks_x[:-1, :, :] = (gradient_x[:-1, :, :] > 0) & (gradient_x[1:, :, :] < 0)
-    peaks_y[:, :-1, :] = (gradient_y[:, :-1, :] > 0) & (gradient_y[:, 1:, :] < 0)
-    peaks_z[:, :, :-1] = (gradient_z[:, :, :-1] > 0) & (gradient_z[:, :, 1:] < 0)
-
-    
-    # Combine peaks from all directions
-    peaks = peaks_x + peaks_y + peaks_z
-    peaks = peaks.astype(float)
-    peaks_x = peaks_x.astype(float)
-    peaks_y = peaks_y.astype(float)
-    peaks_z = peaks_z.astype(float)
-    peaks = gaussian_filter(peaks, sigma=2, radius=2)
-
-    ### --------------------
-    ### VDB stuff now
-    ### --------------------
-
-    vdb_grid = vdb.FloatGrid()
-    #vdb_grid.background = 0.0
-    vdb_grid.name = 'magnitude'
-
-    sobel_grid = vdb.FloatGrid()
-    sobel_grid.name = 'sobel'
-
-    sobel_grid_x = vdb.FloatGrid()
-    sobel_grid_x.name = 'sobel_x'
-    sobel_grid_y = vdb.FloatGrid()
-    sobel_grid_y.name = 'sobel_y'
-    sobel_grid_z = vdb.FloatGrid()
-    sobel_grid_z.name = 'sobel_z'
-
-    accessor = vdb_grid.getAccessor()
-    sobel_accessor = sobel_grid.getAccessor()
-    sobel_accessor_x = sobel_grid_x.getAccessor()
-    sobel_accessor_y = sobel_grid_y.getAccessor()
-    sobel_accessor_z = sobel_grid_z.getAccessor()
-
-    # compute the scale factor 
-    scale_factor = 1 / cell_size
-    print(f"scale_factor = {scale_factor} ( scale down by a factor of {cell_size})")
-
-    for index_x, x in enumerate(grid_x):
-        for index_y, y in enumerate(grid_y):
-            for index_z, z in enumerate(grid_z):
-                accessor.setValueOn((index_x, index_y, index_z),
-                                    interpolated_volume[index_x][index_y][index_z])
-                sobel_accessor.setValueOn((index_x, index_y, index_z),
-                                    gradient_x[index_x][index_y][index_z] +
-                                    gradient_y[index_x][index_y][index_z] + 
-                                    gradient_z[index_x][index_y][index_z])
-                sobel_accessor_x.setValueOn((index_x, index_y, index_z),
-                                    gradient_x[index_x][index_y][index_z])
-                sobel_accessor_y.setValueOn((index_x, index_y, index_z),
-                                    gradient_y[index_x][index_y][index_z])
-                sobel_accessor_z.setValueOn((index_x, index_y, index_z),
-                                    gradient_z[index_x][index_y][index_z])
-
-
-    #print(f"write {vdb_file}")
-    vdb.write(vdb_file, grids=[vdb_grid, sobel_grid, sobel_grid_x, sobel_grid_y, sobel_grid_z])
-
-    return scale_factor, (offset_x, offset_y, offset_z)
-
-def thread_func(args):
-    file_split, basename, dicing_factor = args
-    scale_factor = 1
-    offset = (0,0,0)
-    for local_index, (index, file_vtr) in enumerate(file_split):
-        print(file_vtr)
-        file_vdb = f"{basename}_{int(index):06d}.vdb"
-        scale_factor, offset = vtr_to_vdb(file_vtr, os.path.join(os.path.dirname(file_vtr), file_vdb), dicing_factor)
-        print(f"processed {int((local_index+1)/len(file_split)*100)}% of thread split")
-
-    return scale_factor, offset
-
-def run_parrallel(args, thread_count):
-    with multiprocessing.Pool(processes=thread_count) as pool:
-        results = pool.map(thread_func, args)
-
-        return results
+    _, point_data = read_frame(frame, axes)
+    plane = slice_plane(point_data, axes, options['axis'], options['position'], options['resolution'])
+    if options['use_log']:
+        values = field_volumes(plane, use_log=True, log_offset=options['log_offset'], 
+                               log_scale=options['log_scale'])['magnitude']
+    else:
+        values = plane / options['maximum'] if options['maximum'] else plane
+    # rows are v from top to bottom, columns u
+    write_png(png_file, colormap(values, options['lut'])[:, ::-1].transpose(1, 0, 2))
+    return index, png_file, time.time() - time_start
@@ -0,0 +1,362 @@
+import numpy as np
+import hashlib
+import json
+import os
+import zipfile
+from collections import defaultdict
+
+# binary STL triangle record, 50 bytes, little endian
+STL_TRIANGLE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attribute', '<u2'),
+])
+
+def compact(vertices, faces):
+    """Drop the vertices no face refers to and renumber the faces accordingly"""
+    used, inverse = np.unique(faces, return_inverse=True)
+    return vertices[used], inverse.reshape(faces.shape)
+
+def triangle_normals(vertices, faces):
+    """Unit normals of triangles, zero for degenerate ones"""
+    triangles = vertices[faces]
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+
+def write_binary_stl(stl_file, vertices, faces):
+    """Write triangles to a binary STL straight from the vertex and face arrays"""
+    data = np.zeros(len(faces), dtype=STL_TRIANGLE)
+    data['normal'] = triangle_normals(vertices, faces)
+    data['vertices'] = vertices[faces]
+
+    with open(stl_file, 'wb') as f:
+        # the header must not start with 'solid', readers would take it for ascii
+        f.write(b'IntuitionRF binary STL'.ljust(80, b'\0'))
+        f.write(np.uint32(len(faces)).tobytes())
+        data.tofile(f)
+
+def read_binary_stl(stl_file):
+    """Triangle corners of a binary STL as a (n, 3, 3) array"""
+    with open(stl_file, 'rb') as f:
+        f.seek(80)
+        count = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+        data = np.fromfile(f, dtype=STL_TRIANGLE, count=count)
+    return data['vertices']
+
+def add_polyhedron(prop, vertices, faces, stl_file=None, priority=None):
+    """Add a triangulated polyhedron to a CSX property.
+    Vertices and faces are handed to CSXCAD in memory, or through a binary STL
+    read back by the polyhedron reader when stl_file is given"""
+    vertices, faces = compact(np.asarray(vertices, dtype=np.float64), np.asarray(faces))
+
+    if stl_file is None and isinstance(prop, Recorder):
+        # recorded as the arrays themselves rather than a call per vertex and face
+        return prop.record_polyhedron(vertices, faces, priority)
+
+    if stl_file is None:
+        prim = prop.AddPolyhedron()
+        for x, y, z in vertices.tolist():
+            prim.AddVertex(x, y, z)
+        for face in faces.tolist():
+            prim.AddFace(face)
+    else:
+        write_binary_stl(stl_file, vertices, faces)
+        prim = prop.AddPolyhedronReader(stl_file)
+        prim.SetFileType(1) # 1 STL, 2 PLY
+        prim.ReadFile()
+        prim.Update()
+        prim.SetPrimitiveUsed(True)
+
+    if priority is not None:
+        prim.SetPriority(priority)
+    return prim
+
+# in-plane axes of the polygon coordinates for each normal, as used by AddPolygon
+PLANE_AXES = {'x': (1, 2), 'y': (2, 0), 'z': (0, 1)}
+
+def axis_aligned_faces(vertices, corners, loop_starts, loop_totals, polygons=None, margin=.0001):
+    """Polygons lying in a plane normal to x, y or z as (normal, elevation, points), 
+    points being the two lists of in-plane coordinates as taken by AddPolygon. 
+    A polygon is in such a plane when all its corners are within margin of its 
+    first one along that axis (x first, then y, then z). polygons is an optional 
+    boolean mask of the faces to consider"""
+    loop_starts, loop_totals = np.asarray(loop_starts), np.asarray(loop_totals)
+    if len(loop_starts) == 0:
+        return []
+
+    # corners of every polygon laid out one polygon after the other
+    offsets = np.cumsum(loop_totals) - loop_totals
+    loops = np.repeat(loop_starts - offsets, loop_totals) + np.arange(np.sum(loop_totals))
+    points = vertices[np.asarray(corners)[loops]]
+
+    deviation = np.abs(points - np.repeat(points[offsets], loop_totals, axis=0))
+    aligned = np.maximum.reduceat(deviation, offsets, axis=0) <= margin
+    keep = aligned.any(axis=1)
+    if polygons is not None:
+        keep &= polygons
+    # first aligned axis
+    normals = np.argmax(aligned, axis=1)
+
+    # python lists only for the faces kept
+    faces = []
+    for index in np.flatnonzero(keep):
+        normal = 'xyz'[normals[index]]
+        first, second = PLANE_AXES[normal]
+        face = points[offsets[index]:offsets[index] + loop_totals[index]].T.tolist()
+        faces.append((normal, face[normals[index]][0], [face[first], face[second]]))
+    return faces
+
+def shoelace(points):
+    """Signed area of a closed 2D polygon given as a list of points"""
+    points = np.asarray(points, dtype=np.float64)
+    x, y = points[:, 0], points[:, 1]
+    return .5 * (np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+def face_edges(face):
+    """Undirected edges of a face given as a list of 2D points"""
+    return [tuple(sorted((face[i], face[i - 1]))) for i in range(len(face))]
+
+def connected_faces(faces):
+    """Split faces into groups connected through shared edges"""
+    parent = list(range(len(faces)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    edge_owner = {}
+    for index, face in enumerate(faces):
+        for edge in face_edges(face):
+            if edge in edge_owner:
+                parent[find(index)] = find(edge_owner[edge])
+            else:
+                edge_owner[edge] = index
+
+    components = defaultdict(list)
+    for index in range(len(faces)):
+        components[find(index)].append(index)
+    return list(components.values())
+
+def drop_collinear(outline):
+    """Remove the points lying on a straight segment of a closed outline"""
+    points = np.asarray(outline, dtype=np.float64)
+    before = np.roll(points, 1, axis=0) - points
+    after = np.roll(points, -1, axis=0) - points
+    cross = before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]
+    return [point for point, c in zip(outline, cross) if abs(c) > 1e-12]
+
+def face_outline(faces):
+    """Outline of a set of connected coplanar faces, or None when they do not form
+    a simple polygon (holes, pinched corners, T-junctions or overlaps)"""
+    edge_count = defaultdict(int)
+    for face in faces:
+        for edge in face_edges(face):
+            edge_count[edge] += 1
+
+    neighbours = defaultdict(list)
+    for (a, b), count in edge_count.items():
+        if count > 2:
+            return None
+        if count == 1:
+            neighbours[a].append(b)
+            neighbours[b].append(a)
+    # no boundary at all when every edge is shared, as with duplicated faces
+    if len(neighbours) == 0 or any(len(n) != 2 for n in neighbours.values()):
+        return None
+
+    # walk the boundary, a single loop is required since polygons can't hold holes
+    start = next(iter(neighbours))
+    outline = [start]
+    previous, current = start, neighbours[start][0]
+    while current != start:
+        outline.append(current)
+        a, b = neighbours[current]
+        previous, current = current, (b if a == previous else a)
+    if len(outline) != len(neighbours):
+        return None
+
+    outline = drop_collinear(outline)
+    area = sum(abs(shoelace(face)) for face in faces)
+    if len(outline) < 3 or abs(abs(shoelace(outline)) - area) > 1e-9 * max(area, 1):
+        return None
+    return outline
+
+def is_rectangle(outline):
+    """True for 4 point outlines whose edges all follow an axis"""
+    if len(outline) != 4:
+        return False
+    return all(outline[i][0] == outline[i - 1][0] or outline[i][1] == outline[i - 1][1]
+               for i in range(4))
+
+def plane_to_xyz(normal, elevation, point):
+    """3D coordinates of an in-plane point"""
+    xyz = [0, 0, 0]
+    xyz['xyz'.index(normal)] = elevation
+    first, second = PLANE_AXES[normal]
+    xyz[first] = float(point[0])
+    xyz[second] = float(point[1])
+    return xyz
+
+def merge_coplanar_faces(faces):
+    """Merge connected axis aligned faces sharing a normal and elevation.
+    faces are (normal, elevation, points) with points the two lists of in-plane
+    coordinates, as taken by AddPolygon. Returns outline polygons in the same form,
+    and (start, stop) boxes for the rectangular ones. Groups that do not form a simple
+    polygon are kept as their individual faces"""
+    planes = defaultdict(list)
+    for normal, elevation, points in faces:
+        planes[(normal, elevation)].append(list(zip(*points)))
+
+    polygons = []
+    boxes = []
+    for (normal, elevation), plane_faces in planes.items():
+        for component in connected_faces(plane_faces):
+            outline = face_outline([plane_faces[index] for index in component])
+            if outline is None:
+                outlines = [plane_faces[index] for index in component]
+            else:
+                outlines = [outline]
+
+            for outline in outlines:
+                if is_rectangle(outline):
+                    corners = np.array(outline)
+                    boxes.append((plane_to_xyz(normal, elevation, corners.min(axis=0)),
+                                  plane_to_xyz(normal, elevation, corners.max(axis=0))))
+                else:
+                    polygons.append((normal, elevation, [list(a) for a in zip(*outline)]))
+
+    return polygons, boxes
+
+def add_merged_faces(prop, faces, priority=10):
+    """Add axis aligned faces to a CSX property once merged, returns the number of
+    primitives saved by the merge"""
+    polygons, boxes = merge_coplanar_faces(faces)
+    for normal, elevation, points in polygons:
+        prim = prop.AddPolygon(points, normal, elevation)
+        prim.SetPriority(priority)
+    for start, stop in boxes:
+        prim = prop.AddBox(start, stop)
+        prim.SetPriority(priority)
+    return len(faces) - len(polygons) - len(boxes)
+
+# recorded call standing for a whole in memory polyhedron, see Recorder.record_polyhedron
+POLYHEDRON = 'polyhedron'
+
+def encode_value(value, arrays):
+    """JSON compatible form of a recorded argument, numpy arrays are moved to arrays
+    and referred to by name"""
+    if isinstance(value, np.ndarray):
+        name = f"array_{len(arrays)}"
+        arrays[name] = value
+        return {'__array__': name}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v, arrays) for v in value]
+    if isinstance(value, dict):
+        return {key: encode_value(v, arrays) for key, v in value.items()}
+    return value
+
+def decode_value(value, arrays):
+    if isinstance(value, list):
+        return [decode_value(v, arrays) for v in value]
+    if isinstance(value, dict):
+        if '__array__' in value:
+            return arrays[value['__array__']]
+        return {key: decode_value(v, arrays) for key, v in value.items()}
+    return value
+
+class Recorder:
+    """Stands in for a CSX structure, property or primitive and records the calls
+    made on it, so that the export of an object can be cached and replayed"""
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+
+        def record(*args, **kwargs):
+            child = Recorder()
+            self.calls.append((method, args, kwargs, child))
+            return child
+        return record
+
+    def record_polyhedron(self, vertices, faces, priority=None):
+        """Record an in memory polyhedron, replayed through add_polyhedron"""
+        self.calls.append((POLYHEDRON, (vertices, faces), {'priority': priority}, None))
+
+    def prune(self):
+        """Drop the children no call was made on, before saving"""
+        self.calls = [(method, args, kwargs, child.prune() if child is not None and child.calls else None)
+                      for method, args, kwargs, child in self.calls]
+        return self
+
+    def replay(self, target):
+        for method, args, kwargs, child in self.calls:
+            if method == POLYHEDRON:
+                add_polyhedron(target, *args, **kwargs)
+                continue
+            result = getattr(target, method)(*args, **kwargs)
+            if child is not None:
+                child.replay(result)
+
+    def files(self):
+        """Files read back by the recorded primitives"""
+        files = [args[0] for method, args, kwargs, child in self.calls if method == 'AddPolyhedronReader']
+        for method, args, kwargs, child in self.calls:
+            if child is not None:
+                files += child.files()
+        return files
+
+    def encode(self, arrays):
+        """JSON compatible form of the recorded calls, arrays go to the arrays dict"""
+        return [[method, encode_value(args, arrays), encode_value(kwargs, arrays),
+                 None if child is None else child.encode(arrays)]
+                for method, args, kwargs, child in self.calls]
+
+    @classmethod
+    def decode(cls, calls, arrays):
+        recorder = cls()
+        recorder.calls = [(method, decode_value(args, arrays), decode_value(kwargs, arrays),
+                           None if child is None else cls.decode(child, arrays))
+                          for method, args, kwargs, child in calls]
+        return recorder
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def save_fragment(cache_file, recorder, merged=0):
+    """Save the recorded export of an object along with digests of the files it reads,
+    as an npz holding the recorded arrays and the calls as JSON metadata"""
+    recorder.prune()
+    arrays = {}
+    metadata = {
+        'calls': recorder.encode(arrays),
+        'merged': merged,
+        'files': {path: file_digest(path) for path in recorder.files()},
+    }
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, 'wb') as f:
+        np.savez(f, metadata=np.array(json.dumps(metadata)), **arrays)
+
+def load_fragment(cache_file):
+    """Recorded export of an object and the primitives it saved by merging,
+    None when it isn't cached or a file it reads has changed since"""
+    try:
+        with np.load(cache_file, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            arrays = {name: data[name] for name in data.files if name != 'metadata'}
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None
+    for path, digest in metadata['files'].items():
+        if not os.path.exists(path) or file_digest(path) != digest:
+            return None
+    return Recorder.decode(metadata['calls'], arrays), metadata['merged']
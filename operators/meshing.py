@@ -8,10 +8,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import math
 import glob
-from collections import defaultdict
+import re
+import hashlib
+from collections import defaultdict, namedtuple
+from types import MappingProxyType
 from . import convert
-from .convert import run_parrallel
+from . import csx_export
 import multiprocessing
+import time
+import threading
 
 # workaround a bug in vtk/or python interpreter bundled with blender 
 from unittest.mock import MagicMock
@@ -30,6 +35,14 @@ from openEMS.physical_constants import *
 from collections import defaultdict
 ports = defaultdict(lambda: None)
 nf2ff = None
+# primitives saved by merging coplanar faces during the last scene export
+merged_primitives = 0
+# objects replayed from the export cache and exported anew during the last scene export
+export_cache_stats = {'reused': 0, 'exported': 0}
+# object types whose CSX primitives only depend on their own snapshot, cached across runs
+CACHED_OBJECT_TYPES = ("metal_aa_faces", "metal_volume", "metal_edges", "material", "geometry_node")
+# bump when the export of cached objects changes
+EXPORT_CACHE_VERSION = 1
 
 import tempfile
 
@@ -209,6 +222,17 @@ class IntuitionRF_OT_add_default_lines(bpy.types.Operator):
         context.scene.intuitionRF_smooth_max_res = wavelength_over_2 / 20
         return {"FINISHED"}
     
+def report_export(operator):
+    """Report what merging and the export cache saved on the last scene export"""
+    messages = []
+    if merged_primitives > 0:
+        messages.append(f"merged coplanar faces, {merged_primitives} primitives removed")
+    if export_cache_stats['reused'] > 0:
+        messages.append(f"reused {export_cache_stats['reused']} unchanged objects, "
+                        f"exported {export_cache_stats['exported']}")
+    if len(messages) > 0:
+        operator.report({'INFO'}, "; ".join(messages).capitalize())
+
 class IntuitionRF_OT_preview_CSX(bpy.types.Operator):
     """Preview SIM from current configuration in CSXCAD"""
     bl_idname = "intuitionrf.preview_csx"
@@ -218,13 +242,16 @@ class IntuitionRF_OT_preview_CSX(bpy.types.Operator):
         FDTD = openEMS(NrTS=1, EndCriteria=1e-4)
 
 
+        # evaluate the scene objects once for both mesh lines and CSX primitives
+        snapshot = scene_snapshot(context)
         CSX = CSXCAD.ContinuousStructure()
-        CSX = meshlines_from_scene(CSX, context)
+        CSX = meshlines_from_scene(CSX, context, snapshot)
         FDTD.SetCSX(CSX)
         FDTD.SetGaussExcite( context.scene.center_freq * 1e6, context.scene.cutoff_freq * 1e6)
         FDTD.SetBoundaryCond( ['MUR', 'MUR', 'MUR', 'MUR', 'MUR', 'PML_8'] )
 
-        FDTD, CSX = objects_from_scene(FDTD, CSX, context)
+        FDTD, CSX = objects_from_scene(FDTD, CSX, context, snapshot)
+        report_export(self)
 
         mesh = CSX.GetGrid()
         mesh_res = context.scene.intuitionRF_smooth_max_res
@@ -248,13 +275,16 @@ class IntuitionRF_OT_preview_PEC_dump(bpy.types.Operator):
     def execute(self, context):
         FDTD = openEMS(NrTS=1, EndCriteria=1e-4)
 
+        # evaluate the scene objects once for both mesh lines and CSX primitives
+        snapshot = scene_snapshot(context)
         CSX = CSXCAD.ContinuousStructure()
-        CSX = meshlines_from_scene(CSX, context)
+        CSX = meshlines_from_scene(CSX, context, snapshot)
         FDTD.SetCSX(CSX)
         FDTD.SetGaussExcite( context.scene.center_freq * 1e6, context.scene.cutoff_freq * 1e6)
         FDTD.SetBoundaryCond( ['MUR', 'MUR', 'MUR', 'MUR', 'MUR', 'PML_8'] )
 
-        FDTD, CSX = objects_from_scene(FDTD, CSX, context)
+        FDTD, CSX = objects_from_scene(FDTD, CSX, context, snapshot)
+        report_export(self)
 
         #mesh = CSX.GetGrid()
         #mesh_res = context.scene.intuitionRF_smooth_max_res
@@ -276,16 +306,20 @@ class IntuitionRF_OT_run_sim(bpy.types.Operator):
 
     def execute(self, context):
         run_sim(context)
+        report_export(self)
         return {"FINISHED"}
 
-def run_sim(context):
+def setup_sim(context):
+    """Build the openEMS simulation of the scene, ready to run"""
     global nf2ff
     FDTD = openEMS(NrTS=1e6, EndCriteria=1e-4)
     if context.scene.intuitionRF_oversampling > 1:
         FDTD.SetOverSampling(context.scene.intuitionRF_oversampling)
 
+    # evaluate the scene objects once for both mesh lines and CSX primitives
+    snapshot = scene_snapshot(context)
     CSX = CSXCAD.ContinuousStructure()
-    CSX = meshlines_from_scene(CSX, context)
+    CSX = meshlines_from_scene(CSX, context, snapshot)
     FDTD.SetCSX(CSX)
     if context.scene.intuitionRF_excitation_type == "gauss":
         FDTD.SetGaussExcite( context.scene.center_freq * 1e6, context.scene.cutoff_freq * 1e6)
@@ -296,7 +330,7 @@ def run_sim(context):
 
     FDTD.SetBoundaryCond( ['MUR', 'MUR', 'MUR', 'MUR', 'MUR', 'MUR'] )
 
-    FDTD, CSX = objects_from_scene(FDTD, CSX, context)
+    FDTD, CSX = objects_from_scene(FDTD, CSX, context, snapshot)
 
     mesh = CSX.GetGrid()
     mesh_res = context.scene.intuitionRF_smooth_max_res
@@ -305,6 +339,11 @@ def run_sim(context):
     # Add the nf2ff recording box
     nf2ff = FDTD.CreateNF2FFBox()
 
+    return FDTD, CSX
+
+def run_sim(context):
+    FDTD, CSX = setup_sim(context)
+
     FDTD.Run(sim_path=context.scene.intuitionRF_simdir, cleanup=False)
 
     update_port_list(ports)
@@ -510,93 +549,773 @@ class IntuitionRF_returnloss_plotter(bpy.types.Operator):
         except:
             self.report({'INFO'}, "Failed to calc port")
 
-class IntuitionRF_OT_convert_volume_single_frame(bpy.types.Operator):
+def dump_frames(context, dumpbox):
+    """Frames of a dump box ordered by time: its vtr files, or the timesteps of its 
+    h5 file (could be none if sim never ran). Frequency domain field dumps give 
+    phase_steps frames synthesized over one period"""
+    properties = dumpbox.intuitionRF_properties
+    prefix = os.path.join(context.scene.intuitionRF_simdir, dumpbox.name)
+    if is_phasor_dump(dumpbox):
+        if properties.dump_file_type == "1":
+            return convert.h5_phasor_frames(f"{prefix}.h5", properties.phase_steps)
+        return convert.vtr_phasor_frames(prefix, properties.phase_steps)
+    if properties.dump_file_type == "1":
+        return convert.h5_frames(f"{prefix}.h5")
+    return sorted(glob.glob(f"{prefix}*vtr"))
+
+def resolution_settings(properties):
+    """ResamplingPlan arguments choosing the output resolution of a dump box"""
+    if properties.resolution_mode == 'voxels':
+        return {'voxel_budget': properties.voxel_budget}
+    if properties.resolution_mode == 'memory':
+        # dense float32 grids, what Blender holds in memory for each frame
+        grid_count = max(len(properties.output_grids), 1)
+        return {'voxel_budget': properties.frame_memory_budget * 1024 * 1024 // (4 * grid_count)}
+    return {'dicing_factor': properties.dicing_factor}
+
+# seconds per voxel and grid until a conversion of the dump box has been timed
+DEFAULT_SECONDS_PER_VOXEL = 1e-7
+
+# frame count and mesh axes of the dump boxes, read by the estimate operator or a 
+# conversion, so the panel never reads dump files while drawing
+dump_axes_cache = {}
+
+def read_dump_axes(context, dumpbox):
+    """Frame count and mesh axes of a dump box, None if it has no frames"""
+    frames = dump_frames(context, dumpbox)
+    if len(frames) == 0:
+        return None
+    axes, _ = convert.read_frame(frames[0])
+    return (len(frames), tuple(np.array(axis) for axis in axes))
+
+def conversion_estimate(dumpbox):
+    """Grid dimensions, bytes and seconds per frame and total seconds of converting 
+    all frames of a dump box with its current settings, None until its axes are known. 
+    No file is read, it is cheap enough for the panel to ask on every redraw"""
+    properties = dumpbox.intuitionRF_properties
+    dump = dump_axes_cache.get(dumpbox.name)
+    if dump is None:
+        return None
+
+    frame_count, axes = dump
+    cell_size = convert.plan_cell_size(axes, **resolution_settings(properties))
+    shape = convert.grid_shape(axes, cell_size)
+    grid_voxels = int(np.prod(shape)) * max(len(properties.output_grids), 1)
+    seconds_per_voxel = properties.seconds_per_voxel or DEFAULT_SECONDS_PER_VOXEL
+    frame_seconds = grid_voxels * seconds_per_voxel
+    return {
+        'shape': shape,
+        'frame_bytes': 4 * grid_voxels,
+        'frame_seconds': frame_seconds,
+        'frame_count': frame_count,
+        'total_seconds': frame_seconds * frame_count / max(min(properties.thread_count, frame_count), 1),
+    }
+
+def is_phasor_dump(dumpbox):
+    """Frequency domain vector field dumps hold a complex phasor per voxel"""
+    return dumpbox.intuitionRF_properties.dump_type in ("10", "11", "12", "13")
+
+def statistics_file(context, dumpbox):
+    """Cache of the sequence statistics of a dump box's frames"""
+    return os.path.join(context.scene.intuitionRF_simdir, f"{dumpbox.name}_statistics.json")
+
+def uses_sequence_normalization(dumpbox):
+    properties = dumpbox.intuitionRF_properties
+    return properties.use_log and properties.normalization == 'sequence'
+
+def conversion_options(context, dumpbox, statistics=None):
+    """Keyword arguments for convert.vtr_to_vdb from the dump box's settings. 
+    statistics are the sequence statistics of the dump box's frames, without them 
+    (not computed yet, or the sequence is not complete) the fixed normalization is used"""
+    properties = dumpbox.intuitionRF_properties
+
+    normalization = {}
+    if uses_sequence_normalization(dumpbox) and statistics is not None:
+        normalization = convert.sequence_normalization(statistics, properties.normalization_percentile)
+
+    return {
+        **normalization,
+        'use_log': properties.use_log,
+        'memory_budget': properties.memory_budget * 1024 * 1024,
+        # keep the output order stable whatever the selection order
+        'grids': tuple(name for name in convert.GRID_NAMES if name in properties.output_grids),
+        'energy_coefficient': energy_coefficient(properties.dump_type),
+        'sparse_threshold': properties.sparse_threshold if properties.use_sparse else None,
+        'background': properties.sparse_background if properties.use_sparse else 0.0,
+        'prune': properties.sparse_prune,
+        'lod_factors': tuple(sorted(int(factor) for factor in properties.lod_levels)),
+        'half_float': properties.half_float,
+    }
+
+def energy_coefficient(dump_type):
+    """Energy density coefficient of |field|^2 for a dump type"""
+    if dump_type in ("0", "10"):
+        return .5 * EPS0
+    if dump_type in ("1", "11"):
+        return .5 * MUE0
+    # not an E or H field, plain 1/2 |v|^2
+    return .5
+
+class IntuitionRF_volume_converter(bpy.types.Operator):
+    """Base class for the volume conversion operators. Frames are converted on the 
+    worker pool while a modal timer collects them, so Blender stays usable and the 
+    frames already converted can be scrubbed while the rest are processing"""
+    relative_path = False
+    # read the sequence statistics first when they are not cached, otherwise the 
+    # fixed normalization is used until they are
+    scan_statistics = True
+
+    def frame_indices(self, context, files):
+        """Indices of the dump files to convert, None if there is nothing to do. 
+        All frames unless a subclass narrows it down"""
+        if len(files) == 0:
+            self.report({"ERROR"}, "No dump files found for this dump box")
+            return None
+
+        return list(range(len(files)))
+
+    def execute(self, context):
+        return self.invoke(context, None)
+
+    def invoke(self, context, event):
+        dumpbox = context.active_object
+        properties = dumpbox.intuitionRF_properties
+        if len(properties.output_grids) == 0:
+            self.report({"ERROR"}, "No output grid selected")
+            return {"CANCELLED"}
+
+        # the h5 file's index is read once here, workers then only read their frame
+        files = dump_frames(context, dumpbox)
+        self.dumpbox_name = dumpbox.name
+        self.files = files
+        self.indices = self.frame_indices(context, files)
+        if self.indices is None:
+            return {"CANCELLED"}
+
+        self.ready = set()
+        self.pending = []
+        self.running = []
+        self.task_count = 0
+        self.frame_times = []
+        self.frame_statistics = []
+        self.write_stats = []
+        self.time_start = time.time()
+        self.volume_name = None
+
+        # tasks are handed out a few at a time so cancelling does not have to 
+        # drain a queue holding the whole sequence, and so that the shared pool 
+        # runs at most thread_count of them for this conversion
+        self.pool = convert.get_pool()
+        self.max_running = max(properties.thread_count, 1)
+
+        statistics = None
+        self.scanning = False
+        if uses_sequence_normalization(dumpbox):
+            self.statistics_file = statistics_file(context, dumpbox)
+            statistics = convert.cached_statistics(files, self.statistics_file)
+            if statistics is None and self.scan_statistics:
+                # every frame is read once for the statistics, on the pool as the 
+                # first phase of the modal rather than here on Blender's thread
+                self.scanning = True
+                self.pending = list(files)
+            elif statistics is None:
+                self.report({"INFO"}, "Sequence statistics not computed yet, using the fixed normalization")
+
+        if not self.scanning:
+            self.start_conversion(context, dumpbox, statistics)
+
+        wm = context.window_manager
+        wm.progress_begin(0, 1)
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+
+        # frames that are up to date are available right away
+        self.update_volume(context)
+
+        return {"RUNNING_MODAL"}
+
+    def start_conversion(self, context, dumpbox, statistics=None):
+        """Queue the frames to convert once the normalization is known"""
+        simdir = context.scene.intuitionRF_simdir
+        files = self.files
+        options = conversion_options(context, dumpbox, statistics)
+
+        # only convert the frames that changed since the last run with the same settings
+        self.manifest_file = os.path.join(simdir, f"{dumpbox.name}_manifest.json")
+        self.manifest = convert.load_manifest(self.manifest_file)
+        resolution = resolution_settings(dumpbox.intuitionRF_properties)
+        self.params = convert.conversion_params(resolution, options)
+        stale = convert.stale_frames(files, dumpbox.name, self.manifest, self.params, self.indices)
+
+        self.outputs = {index: convert.vdb_filename(files[index], dumpbox.name, index) for index in self.indices}
+        self.ready = set(self.indices) - set(stale)
+
+        if len(stale) == 0:
+            entry = self.manifest[os.path.basename(self.outputs[self.indices[0]])]
+            self.scale_factor = entry['scale_factor']
+            self.offset = tuple(entry['offset'])
+            self.plan = None
+        else:
+            # all frames share the same grid, so the resampling is set up once for all workers
+            self.plan = convert.ResamplingPlan.from_frame(files[0], **resolution)
+            dump_axes_cache[dumpbox.name] = (len(files), self.plan.axes)
+            self.scale_factor = self.plan.scale_factor
+            self.offset = self.plan.offset
+
+        self.pending = convert.conversion_tasks(files, dumpbox.name, self.plan, options, stale)
+        self.task_count = len(self.pending)
+        # phase frames span a single period, played in a loop
+        self.periodic = is_phasor_dump(dumpbox)
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.report({"INFO"}, f"Conversion cancelled, {len(self.frame_times)} of {self.task_count} frames converted")
+            return self.finish(context, {"CANCELLED"})
+
+        if event.type != 'TIMER':
+            return {"PASS_THROUGH"}
+
+        if self.scanning:
+            return self.scan(context)
+
+        error = self.collect_results()
+        if error is not None:
+            self.report({"ERROR"}, f"Conversion failed: {error}")
+            return self.finish(context, {"CANCELLED"})
+
+        self.feed_workers()
+
+        done = len(self.frame_times)
+        context.window_manager.progress_update(done / max(self.task_count, 1))
+        context.workspace.status_text_set(f"IntuitionRF: converted {done}/{self.task_count} frames (Esc to cancel)")
+        self.update_volume(context)
+
+        if len(self.pending) == 0 and len(self.running) == 0:
+            self.report_conversion()
+            return self.finish(context, {"FINISHED"})
+
+        return {"PASS_THROUGH"}
+
+    def scan(self, context):
+        """Statistics phase of the modal: read the frames on the pool, then start 
+        converting them with the sequence normalization"""
+        for result in [result for result in self.running if result.ready()]:
+            self.running.remove(result)
+            try:
+                self.frame_statistics.append(result.get())
+            except Exception as e:
+                self.report({"ERROR"}, f"Reading the frame statistics failed: {e}")
+                return self.finish(context, {"CANCELLED"})
+
+        while len(self.pending) > 0 and len(self.running) < self.max_running:
+            self.running.append(self.pool.apply_async(convert.vtr_statistics, (self.pending.pop(0),)))
+
+        done = len(self.frame_statistics)
+        context.window_manager.progress_update(done / max(len(self.files), 1))
+        context.workspace.status_text_set(f"IntuitionRF: reading frame statistics {done}/{len(self.files)} (Esc to cancel)")
+        if len(self.pending) > 0 or len(self.running) > 0:
+            return {"PASS_THROUGH"}
+
+        dumpbox = bpy.data.objects.get(self.dumpbox_name)
+        if dumpbox is None:
+            self.report({"ERROR"}, "The dump box was removed during the conversion")
+            return self.finish(context, {"CANCELLED"})
+
+        statistics = convert.merge_statistics(self.frame_statistics)
+        convert.save_statistics(self.files, self.statistics_file, statistics)
+        self.scanning = False
+        self.start_conversion(context, dumpbox, statistics)
+        self.update_volume(context)
+        return {"PASS_THROUGH"}
+
+    def collect_results(self):
+        """Record the frames the workers are done with, returns the first worker 
+        error if any"""
+        for result in [result for result in self.running if result.ready()]:
+            self.running.remove(result)
+            try:
+                index, file_vdb, seconds, stats = result.get()
+            except Exception as e:
+                return e
+
+            self.ready.add(index)
+            self.frame_times.append(seconds)
+            self.write_stats.append(stats)
+            self.manifest[os.path.basename(file_vdb)] = convert.manifest_entry(self.files[index], self.params, self.plan)
+        return None
+
+    def feed_workers(self):
+        # keep the workers fed
+        while len(self.pending) > 0 and len(self.running) < self.max_running:
+            self.running.append(self.pool.apply_async(convert.convert_task, (self.pending.pop(0),)))
+
+    def report_conversion(self):
+        if self.task_count == 0:
+            self.report({"INFO"}, f"All {len(self.indices)} frames are up to date")
+            return
+
+        done = len(self.frame_times)
+        wall_time = time.time() - self.time_start
+        write_bytes = np.mean([stats['write_bytes'] for stats in self.write_stats])
+        write_seconds = np.mean([stats['write_seconds'] for stats in self.write_stats])
+        self.report({"INFO"}, f"Converted {done} of {len(self.indices)} frames in {wall_time:.1f}s "
+                    f"({np.mean(self.frame_times):.2f}s per frame, slowest {np.max(self.frame_times):.2f}s, "
+                    f"{write_bytes / 1024**2:.1f} MB written in {write_seconds:.2f}s per frame)")
+
+        # sparse conversions only, averaged over the frames for each grid
+        active_ratio = [stats['active_ratio'] for stats in self.write_stats if stats['active_ratio']]
+        if len(active_ratio) > 0:
+            ratios = ", ".join(f"{name} {np.mean([ratio[name] for ratio in active_ratio]):.1%}" 
+                               for name in active_ratio[0])
+            self.report({"INFO"}, f"Active voxels per frame: {ratios}")
+
+    def finish(self, context, status):
+        # frames still running complete in the background, the pending ones are dropped
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        if len(self.frame_times) > 0:
+            convert.save_manifest(self.manifest_file, self.manifest)
+            # measured throughput for the panel's time estimate
+            dumpbox = bpy.data.objects.get(self.dumpbox_name)
+            if dumpbox is not None:
+                voxels = np.prod(self.plan.shape) * len(self.params['grids'])
+                dumpbox.intuitionRF_properties.seconds_per_voxel = np.mean(self.frame_times) / voxels
+        return status
+
+    def update_volume(self, context):
+        """Import the volume as soon as its first frame exists, then grow its 
+        sequence over the contiguous range of converted frames"""
+        count = 0
+        for index in self.indices:
+            if index not in self.ready:
+                break
+            count += 1
+
+        if count == 0:
+            return
+
+        if self.volume_name is None:
+            file0 = self.outputs[self.indices[0]]
+            bpy.ops.object.volume_import(filepath=file0,
+                                         directory=os.path.dirname(file0), 
+                                         files=[{"name":os.path.basename(file0)}],
+                                         relative_path=self.relative_path, 
+                                         align='WORLD', 
+                                         location=(0, 0, 0), 
+                                         scale=(1, 1, 1))
+            volume = context.active_object
+            # scaling in the import doesnt seem to work
+            volume.scale = (1/self.scale_factor, 1/self.scale_factor, 1/self.scale_factor)
+            volume.location = self.offset
+            self.volume_name = volume.name
+
+        # the user may have deleted it meanwhile
+        volume = bpy.data.objects.get(self.volume_name)
+        if volume is not None and len(self.indices) > 1:
+            volume.data.is_sequence = True
+            volume.data.frame_duration = count
+            if self.periodic:
+                volume.data.sequence_mode = 'REPEAT'
+
+class IntuitionRF_OT_convert_volume_single_frame(IntuitionRF_volume_converter):
     """Convert the current frame's vtk dump for selected dump object 
     to OpenVDB file (if frame in available files range, ordered by name)"""
     bl_idname = "intuitionrf.convert_volume_single_frame"
     bl_label = "Convert Current Frame"
+    relative_path = True
+    # a single frame is not worth reading the whole sequence for
+    scan_statistics = False
 
-    def execute(self, context):
-        # find all vtk files in simdir for current dump box (could be 0 if sim never ran)
-        simdir = context.scene.intuitionRF_simdir
-        object_name = context.active_object.name
-
-        files = sorted(glob.glob(f"{os.path.join(simdir, object_name)}*vtr"))
+    def frame_indices(self, context, files):
         frame_relative = context.scene.frame_current - context.scene.frame_start
-        if frame_relative >= len(files):
+        if frame_relative < 0 or frame_relative >= len(files):
             self.report({"ERROR"}, "Current frame is out of existing computed dump files bounds")
-            return {"FINISHED"}
-
-        # find the appropriate file 
-        file_vtr = files[frame_relative]
-        file_vdb = file_vtr.replace(".vtr", ".vdb") # this will cause bug if the object has .vtr as part of name 
-        self.report({"INFO"}, f"Computing OpenVDB for file {file_vtr}")
-
-        dicing_factor = context.active_object.intuitionRF_properties.dicing_factor
-        
-        scale_factor, offset = convert.vtr_to_vdb(file_vtr, file_vdb, dicing_factor)
-
-        # scaling here doesnt seem to work
-        bpy.ops.object.volume_import(
-            filepath=file_vdb, 
-            directory=os.path.dirname(file_vdb), 
-            files=[{"name":os.path.basename(file_vdb)}], 
-            relative_path=True, 
-            align='WORLD', 
-            location=(0, 0, 0), 
-            scale=(1,1,1)
-        )
+            return None
 
-        bpy.ops.transform.resize(value=(1/scale_factor, 1/scale_factor, 1/scale_factor))
-        bpy.ops.transform.translate(value=offset)
+        self.report({"INFO"}, f"Computing OpenVDB for {convert.frame_name(files[frame_relative])}")
+        return [frame_relative]
 
-        return {"FINISHED"}
-
-
-class IntuitionRF_OT_convert_volume_all_frames(bpy.types.Operator):
+class IntuitionRF_OT_convert_volume_all_frames(IntuitionRF_volume_converter):
     """Convert all frames' vtk dump for selected dump object 
     to OpenVDB files (for all frames available in file range, ordered by name)"""
     bl_idname = "intuitionrf.convert_volume_all_frames"
     bl_label = "Convert all Frames"
 
-    def execute(self, context):
+class IntuitionRF_OT_convert_volume_live(IntuitionRF_volume_converter):
+    """Run the simulation in the background and convert the selected dump box's 
+    frames while openEMS writes them, so the animation can be previewed during 
+    the simulation"""
+    bl_idname = "intuitionrf.convert_volume_live"
+    bl_label = "Run SIM with live conversion"
+
+    def invoke(self, context, event):
         simdir = context.scene.intuitionRF_simdir
-        object_name = context.active_object.name
-        thread_count = context.active_object.intuitionRF_properties.thread_count
+        dumpbox = context.active_object
+        properties = dumpbox.intuitionRF_properties
+
+        # openEMS keeps the h5 file open for writing during the whole simulation, 
+        # and frequency domain dumps are only written at its end
+        if properties.dump_file_type != "0" or int(properties.dump_type) >= 10:
+            self.report({"ERROR"}, "Live conversion needs a time domain dump written as VTK")
+            return {"CANCELLED"}
+
+        # the sequence statistics are not known before the end, frames use the 
+        # fixed normalization (and get reconverted by a later full conversion)
+        options = conversion_options(context, dumpbox)
+        if len(options['grids']) == 0:
+            self.report({"ERROR"}, "No output grid selected")
+            return {"CANCELLED"}
+
+        # this also removes the dump box's files of the previous run
+        FDTD, CSX = setup_sim(context)
+
+        self.dumpbox_name = dumpbox.name
+        self.options = options
+        self.resolution = resolution_settings(properties)
+        self.manifest_file = os.path.join(simdir, f"{dumpbox.name}_manifest.json")
+        self.manifest = {}
+        self.params = convert.conversion_params(self.resolution, options)
+
+        self.files = []
+        self.indices = []
+        self.outputs = {}
+        self.ready = set()
+        self.plan = None
+        self.pending = []
+        self.running = []
+        self.task_count = 0
+        self.frame_times = []
+        self.write_stats = []
+        self.time_start = time.time()
+        self.volume_name = None
+        self.periodic = False
+
+        self.pool = convert.get_pool()
+        self.max_running = max(properties.thread_count, 1)
+
+        # openEMS releases the GIL while running, so the timer keeps ticking and 
+        # Blender stays responsive during the simulation
+        self.sim_error = None
+        self.sim = threading.Thread(target=self.simulate, args=(FDTD, simdir), daemon=True)
+        self.sim.start()
+
+        wm = context.window_manager
+        wm.progress_begin(0, 1)
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.modal_handler_add(self)
+
+        return {"RUNNING_MODAL"}
+
+    def simulate(self, FDTD, simdir):
+        try:
+            FDTD.Run(sim_path=simdir, cleanup=False)
+        except Exception as e:
+            self.sim_error = e
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.report({"INFO"}, f"Live conversion stopped after {len(self.frame_times)} frames, the simulation keeps running")
+            return self.finish(context, {"CANCELLED"})
+
+        if event.type != 'TIMER':
+            return {"PASS_THROUGH"}
+
+        error = self.collect_results()
+        if error is not None:
+            self.report({"ERROR"}, f"Conversion failed: {error}")
+            return self.finish(context, {"CANCELLED"})
+
+        # checked before looking for files, so a file seen while the sim runs is 
+        # never taken for complete too early
+        sim_running = self.sim.is_alive()
+        self.add_completed_frames(context, sim_running)
+        self.feed_workers()
+
+        done = len(self.frame_times)
+        state = "simulating" if sim_running else "simulation done"
+        context.workspace.status_text_set(f"IntuitionRF: {state}, converted {done}/{self.task_count} frames (Esc to stop converting)")
+        self.update_volume(context)
+
+        if not sim_running and len(self.pending) == 0 and len(self.running) == 0:
+            if self.sim_error is not None:
+                self.report({"ERROR"}, f"Simulation failed: {self.sim_error}")
+                return self.finish(context, {"CANCELLED"})
+            update_port_list(ports)
+            self.report_conversion()
+            return self.finish(context, {"FINISHED"})
+
+        return {"PASS_THROUGH"}
+
+    def add_completed_frames(self, context, sim_running):
+        """Queue the frames openEMS is done writing. Dumps are written one timestep 
+        after the other, so a file is complete once the next one exists, or once 
+        the simulation is over"""
+        dumpbox = bpy.data.objects.get(self.dumpbox_name)
+        if dumpbox is None:
+            return
+        files = dump_frames(context, dumpbox)
+        complete = max(len(files) - 1, 0) if sim_running else len(files)
+        new = list(range(len(self.indices), complete))
+        if len(new) == 0:
+            return
+
+        self.files = files
+        if self.plan is None:
+            self.plan = convert.ResamplingPlan.from_frame(files[0], **self.resolution)
+            self.scale_factor = self.plan.scale_factor
+            self.offset = self.plan.offset
+
+        for index in new:
+            self.outputs[index] = convert.vdb_filename(files[index], self.dumpbox_name, index)
+        self.indices.extend(new)
+        self.pending.extend(convert.conversion_tasks(files, self.dumpbox_name, self.plan, self.options, new))
+        self.task_count += len(new)
+
+# openEMS' oversampling when the sim does not set it
+OPENEMS_DEFAULT_OVERSAMPLING = 4
+
+dump_estimates = {}
+
+def dump_size_estimate(context, dumpbox, mesh):
+    """Lines, bytes per frame, frame interval and expected frame count of a dump box 
+    on the sim mesh. The frame count comes from the last run when its dump files 
+    are there, otherwise from the length of the excitation (a lower bound)"""
+    properties = dumpbox.intuitionRF_properties
+    unit = context.scene.intuitionRF_unit
+    # same box as the one given to the CSX dump
+    start, stop = start_stop_from_BB(dumpbox.bound_box)
+
+    counts = []
+    min_cells = []
+    for axis, name in enumerate(('x', 'y', 'z')):
+        lines = np.array(mesh.GetLines(name))
+        min_cells.append(np.min(np.diff(lines)) * unit)
+        inside = int(np.sum((lines >= start[axis]) & (lines <= stop[axis])))
+        if properties.dump_sampling == 'subsampling':
+            inside = int(np.ceil(inside / properties.dump_subsampling[axis]))
+        elif properties.dump_sampling == 'resolution' and properties.dump_resolution[axis] > 0:
+            extent = stop[axis] - start[axis]
+            inside = min(inside, int(extent / properties.dump_resolution[axis]) + 1)
+        counts.append(max(inside, 1))
+
+    # 3 float32 components per point (real and imaginary parts for frequency 
+    # domain dumps) and float64 axes
+    components = 6 if int(properties.dump_type) >= 10 else 3
+    frame_bytes = 4 * components * int(np.prod(counts)) + 8 * sum(counts)
+
+    if int(properties.dump_type) >= 10:
+        # one file per frequency
+        return {'lines': counts, 'frame_bytes': frame_bytes, 'interval': None, 
+                'frames': 1, 'from_last_run': False}
+
+    # courant limit on the smallest cells, openEMS' own criterion is close to it
+    dt = 1 / (C0 * np.sqrt(sum(1 / cell**2 for cell in min_cells)))
+    f_max = context.scene.center_freq * 1e6
+    if context.scene.intuitionRF_excitation_type != "sine":
+        f_max += context.scene.cutoff_freq * 1e6
+    oversampling = context.scene.intuitionRF_oversampling
+    if oversampling <= 1:
+        oversampling = OPENEMS_DEFAULT_OVERSAMPLING
+    nyquist = int(1 / (2 * f_max * dt))
+    interval = max(nyquist // oversampling, 1)
+
+    # dumps are named after their timestep
+    prefix = os.path.join(context.scene.intuitionRF_simdir, dumpbox.name)
+    timesteps = [int(match.group(1)) for match in 
+                 (re.match(rf"{re.escape(prefix)}_(\d+)\.vtr$", f) for f in glob.glob(f"{prefix}_*.vtr")) 
+                 if match is not None]
+    from_last_run = len(timesteps) > 0
+    if from_last_run:
+        frames = len(timesteps)
+    else:
+        # gaussian pulse length as computed by openEMS
+        fc = context.scene.cutoff_freq * 1e6
+        frames = int(2 * 9 / (2 * np.pi * fc) / dt) // interval + 1
 
-        files = sorted(glob.glob(f"{os.path.join(simdir, object_name)}*vtr"))
-        files_splits = np.array_split(np.array(list(enumerate(files))), thread_count)
+    return {'lines': counts, 'frame_bytes': frame_bytes, 'interval': interval * dt, 
+            'frames': frames, 'from_last_run': from_last_run}
 
-        dicing_factor = context.active_object.intuitionRF_properties.dicing_factor
+class IntuitionRF_OT_estimate_dump(bpy.types.Operator):
+    """Estimate the number of files and disk footprint the selected dump box will 
+    write, from the current mesh and dump settings"""
+    bl_idname = "intuitionrf.estimate_dump"
+    bl_label = "Estimate dump size"
 
-        args = list(zip(files_splits, [object_name] * len(files_splits), [dicing_factor] * len(files_splits)))
+    def execute(self, context):
+        dumpbox = context.active_object
+        # same mesh as the sim, without the objects (that would clear the last 
+        # run's dump files) so port lines may be missing
+        CSX = CSXCAD.ContinuousStructure()
+        CSX = meshlines_from_scene(CSX, context)
+        mesh = CSX.GetGrid()
+        mesh.SmoothMeshLines('all', context.scene.intuitionRF_smooth_max_res, 1.4)
 
-        results = run_parrallel(args, thread_count)
+        estimate = dump_size_estimate(context, dumpbox, mesh)
+        dump_estimates[dumpbox.name] = estimate
+        self.report({"INFO"}, f"{estimate['frames']} files, {estimate['frames'] * estimate['frame_bytes'] / 1024**3:.2f} GB")
+        return {"FINISHED"}
 
-        scale_factor, offset = results[0] # should all be the same
-        print(scale_factor)
-        print(offset)
+class IntuitionRF_OT_estimate_conversion(bpy.types.Operator):
+    """Read the selected dump box's mesh from its first frame, for the conversion 
+    size and time estimate"""
+    bl_idname = "intuitionrf.estimate_conversion"
+    bl_label = "Estimate conversion"
 
-        files = sorted(glob.glob(f"{os.path.join(simdir, object_name)}*vdb"))
-        files_vdb = []
-        for file in files:
-            file_vdb = os.path.basename(file)
-            files_vdb.append({"name":file_vdb})
+    def execute(self, context):
+        dumpbox = context.active_object
+        try:
+            dump = read_dump_axes(context, dumpbox)
+        except (OSError, ValueError, KeyError) as e:
+            self.report({"ERROR"}, f"Could not read the dump: {e}")
+            return {"CANCELLED"}
+        if dump is None:
+            self.report({"ERROR"}, "No dump files found for this dump box")
+            return {"CANCELLED"}
+
+        dump_axes_cache[dumpbox.name] = dump
+        estimate = conversion_estimate(dumpbox)
+        self.report({"INFO"}, f"~{estimate['total_seconds']:.0f}s for {estimate['frame_count']} frames")
+        return {"FINISHED"}
 
-        print(files_vdb)
-        file0 = files[0]
+class IntuitionRF_OT_slice_dump(bpy.types.Operator):
+    """Colour map an axis aligned slice of every frame of the selected dump box into 
+    an image sequence, shown on a plane at the slice position. Much cheaper than 
+    converting and rendering volumes when a plane is all that matters"""
+    bl_idname = "intuitionrf.slice_dump"
+    bl_label = "Slice to images"
 
-        bpy.ops.object.volume_import(filepath=file0,
-                                     directory=os.path.dirname(file0), 
-                                     files=files_vdb,
-                                     relative_path=False, 
-                                     align='WORLD', 
-                                     location=(0, 0, 0), 
-                                     scale=(1, 1, 1))
+    def execute(self, context):
+        dumpbox = context.active_object
+        properties = dumpbox.intuitionRF_properties
+
+        files = dump_frames(context, dumpbox)
+        if len(files) == 0:
+            self.report({"ERROR"}, "No dump files found for this dump box")
+            return {"CANCELLED"}
+
+        # every frame shares the mesh of the first one
+        axes, _ = convert.read_frame(files[0])
+        axes = tuple(np.array(axis) for axis in axes)
+        axis = 'xyz'.index(properties.slice_axis)
+        position = np.min(axes[axis]) + properties.slice_position * (np.max(axes[axis]) - np.min(axes[axis]))
+
+        # the slices are written in one go, statistics included
+        statistics = None
+        if uses_sequence_normalization(dumpbox) or not properties.use_log:
+            statistics = convert.sequence_statistics(files, properties.thread_count, statistics_file(context, dumpbox))
+        normalization = conversion_options(context, dumpbox, statistics)
+        options = {
+            'axis': axis,
+            'position': float(position),
+            'resolution': properties.slice_resolution,
+            'lut': (plt.get_cmap(properties.slice_colormap)(np.linspace(0, 1, 256)) * 255).astype(np.uint8),
+            'use_log': properties.use_log,
+            'log_offset': normalization.get('log_offset', 15),
+            'log_scale': normalization.get('log_scale', .01),
+            'maximum': None,
+        }
+        if not properties.use_log:
+            options['maximum'] = statistics['max']
+
+        tasks = [(index, frame, convert.slice_filename(frame, dumpbox.name, axis, index), axes, options) 
+                 for index, frame in enumerate(files)]
+        time_start = time.time()
+        results = convert.pool_map(convert.slice_task, tasks, properties.thread_count)
+
+        slice_to_scene(context, dumpbox, axes, axis, position, results[0][1], len(results), is_phasor_dump(dumpbox))
+
+        self.report({"INFO"}, f"Sliced {len(results)} frames in {time.time() - time_start:.2f}s")
+        return {"FINISHED"}
 
-        bpy.ops.transform.resize(value=(1/scale_factor, 1/scale_factor, 1/scale_factor))
-        bpy.ops.transform.translate(value=offset)
+def remove_slice(plane):
+    """Remove a slice plane along with its mesh, material and image sequence, once 
+    nothing else uses them"""
+    mesh = plane.data
+    materials = [material for material in mesh.materials if material is not None]
+    images = [node.image for material in materials if material.node_tree is not None 
+              for node in material.node_tree.nodes if node.type == 'TEX_IMAGE' and node.image is not None]
+
+    bpy.data.objects.remove(plane, do_unlink=True)
+    # each one is only released by the removal of the previous one
+    if mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+    for material in materials:
+        if material.users == 0:
+            bpy.data.materials.remove(material)
+    for image in images:
+        if image.users == 0:
+            bpy.data.images.remove(image)
+
+def slice_to_scene(context, dumpbox, axes, axis, position, first_image, frame_count, cyclic=False):
+    """Plane covering the dump box at the slice position, textured with the slice 
+    image sequence (replaces the previous slice of the dump box)"""
+    name = f"{dumpbox.name}_slice"
+    if name in bpy.data.objects:
+        remove_slice(bpy.data.objects[name])
+
+    # the plane is built in dump coordinates, u and v are the two other axes in order
+    in_plane = [other for other in range(3) if other != axis]
+    vertices = []
+    for u, v in ((0, 0), (1, 0), (1, 1), (0, 1)):
+        vertex = [position] * 3
+        vertex[in_plane[0]] = np.max(axes[in_plane[0]]) if u else np.min(axes[in_plane[0]])
+        vertex[in_plane[1]] = np.max(axes[in_plane[1]]) if v else np.min(axes[in_plane[1]])
+        vertices.append(vertex)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(vertices, [], [(0, 1, 2, 3)])
+    uv_layer = mesh.uv_layers.new()
+    for loop, uv in zip(uv_layer.data, ((0, 0), (1, 0), (1, 1), (0, 1))):
+        loop.uv = uv
+    plane = bpy.data.objects.new(name, mesh)
+    context.collection.objects.link(plane)
+
+    image = bpy.data.images.load(first_image, check_existing=False)
+    image.source = 'SEQUENCE'
+
+    material = bpy.data.materials.new(name)
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    nodes.clear()
+    texture = nodes.new('ShaderNodeTexImage')
+    texture.image = image
+    texture.image_user.frame_duration = frame_count
+    texture.image_user.frame_start = context.scene.frame_start
+    # Blender shows image frame_offset + 1 at frame_start, the slices are numbered from 0
+    texture.image_user.frame_offset = -1
+    texture.image_user.use_auto_refresh = True
+    texture.image_user.use_cyclic = cyclic
+    emission = nodes.new('ShaderNodeEmission')
+    output = nodes.new('ShaderNodeOutputMaterial')
+    material.node_tree.links.new(texture.outputs['Color'], emission.inputs['Color'])
+    material.node_tree.links.new(emission.outputs['Emission'], output.inputs['Surface'])
+    plane.data.materials.append(material)
+
+    return plane
+
+class IntuitionRF_OT_set_volume_lod(bpy.types.Operator):
+    """Switch the active volume's sequence between full resolution and its preview 
+    levels (converted with the dump box's preview levels enabled)"""
+    bl_idname = "intuitionrf.set_volume_lod"
+    bl_label = "Set volume level"
+
+    factor: bpy.props.IntProperty(name='Downsampling factor', default=1, min=1)
 
+    def execute(self, context):
+        volume = context.active_object
+        if volume is None or volume.type != 'VOLUME':
+            self.report({"ERROR"}, "Active object is not a volume")
+            return {"CANCELLED"}
+
+        filepath = convert.lod_filename(volume.data.filepath, self.factor)
+        if not os.path.exists(bpy.path.abspath(filepath)):
+            self.report({"ERROR"}, f"No level {self.factor} for this volume, convert with it enabled first")
+            return {"CANCELLED"}
+
+        # grids of every level carry their own voxel size, the object transform stays the same
+        volume.data.filepath = filepath
         return {"FINISHED"}
 
 class IntuitionRF_OT_plot_port_return_loss(IntuitionRF_returnloss_plotter):
@@ -700,104 +1419,293 @@ def start_stop_from_BB(bound_box):
 
     return [min_x, min_y, min_z], [max_x, max_y, max_z]
 
-def get_axis(verts):
-    """Determine the normal of verts located inside and axis aligned plane"""
-    v0 = verts[0] 
-    x = True 
-    y = True 
-    z = True
-
-    margin = .0001
-
-    for vert in verts[1:]:
-        if abs(vert[0] - v0[0]) > margin:
-            x = False
-        if abs(vert[1] - v0[1]) > margin:
-            y = False
-        if abs(vert[2] - v0[2]) > margin:
-            z = False
-
-    if x:
-        #transpose/slice without numpy
-        a0 = [v[1] for v in verts]
-        a1 = [v[2] for v in verts]
-        return 'x', v0[0], [a0, a1]
-    elif y:
-        a0 = [v[0] for v in verts]
-        a1 = [v[2] for v in verts]
-        return 'y', v0[1], [a1, a0]
-    elif z:
-        a0 = [v[0] for v in verts]
-        a1 = [v[1] for v in verts]
-        return 'z', v0[2], [a0, a1]
-    else: 
-        return 'None', None, None
-    
-
-def objects_from_scene(FDTD, CSX, context):
-    """Exports relevant objects into the continous structure """
+# foreach_get layout of named attributes: property, components and dtype per data type
+ATTRIBUTE_LAYOUT = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT2': ('vector', 2, np.float32),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+}
+
+def mesh_attribute(mesh, name):
+    """Values of a named attribute as a numpy array, one row per element of its domain.
+    None when the mesh has no such attribute"""
+    attribute = mesh.attributes.get(name)
+    if attribute is None:
+        return None
+    prop, width, dtype = ATTRIBUTE_LAYOUT[attribute.data_type]
+    values = np.empty(len(attribute.data) * width, dtype=dtype)
+    attribute.data.foreach_get(prop, values)
+    return values.reshape(-1, width) if width > 1 else values
+
+def mesh_vertices(mesh, digits=None):
+    """Vertex coordinates as a (n, 3) array, rounded when digits is given"""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    co = co.reshape(-1, 3).astype(np.float64)
+    return co if digits is None else np.round(co, digits)
+
+def mesh_edges(mesh):
+    """Edge vertex indices as a (n, 2) array"""
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    return edges.reshape(-1, 2)
+
+def mesh_polygons(mesh):
+    """Polygon vertex indices as a flat corner array, with each polygon's start and size in it"""
+    corners = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', corners)
+    starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', starts)
+    sizes = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', sizes)
+    return corners, starts, sizes
+
+def mesh_loop_triangles(mesh):
+    """Triangle vertex indices as a (n, 3) array and the polygon each triangle comes from"""
+    mesh.calc_loop_triangles()
+    faces = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', faces)
+    polygon_index = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+    mesh.loop_triangles.foreach_get('polygon_index', polygon_index)
+    return faces.reshape(-1, 3), polygon_index
+
+def read_only(array):
+    array.flags.writeable = False
+    return array
+
+# array backed copy of an evaluated mesh, shared by all exporters of a scene snapshot
+MeshArrays = namedtuple('MeshArrays', [
+    'vertices', 'edges', 'corners', 'loop_starts', 'loop_totals',
+    'triangles', 'triangle_polygons', 'attributes'
+])
+
+# everything the exporters need from a simulation object, captured once
+SceneObject = namedtuple('SceneObject', [
+    'name', 'object_type', 'properties', 'matrix_world', 'bound_box', 'mesh', 'anchors'
+])
+
+def mesh_arrays(mesh):
+    """Read a mesh and its intuitionrf.* attributes into read only arrays"""
+    corners, starts, sizes = mesh_polygons(mesh)
+    triangles, triangle_polygons = mesh_loop_triangles(mesh)
+    attributes = {attribute.name: read_only(mesh_attribute(mesh, attribute.name))
+                  for attribute in mesh.attributes
+                  if attribute.name.startswith('intuitionrf.') and attribute.data_type in ATTRIBUTE_LAYOUT}
+    return MeshArrays(
+        vertices = read_only(mesh_vertices(mesh)),
+        edges = read_only(mesh_edges(mesh)),
+        corners = read_only(corners),
+        loop_starts = read_only(starts),
+        loop_totals = read_only(sizes),
+        triangles = read_only(triangles),
+        triangle_polygons = read_only(triangle_polygons),
+        attributes = MappingProxyType(attributes),
+    )
+
+def properties_snapshot(properties):
+    """Plain values of an object's intuitionRF properties"""
+    values = {}
+    for prop in properties.bl_rna.properties:
+        if prop.identifier == 'rna_type':
+            continue
+        value = getattr(properties, prop.identifier)
+        if isinstance(value, set):
+            value = tuple(sorted(value))
+        elif not isinstance(value, str) and hasattr(value, '__len__'):
+            value = tuple(value)
+        values[prop.identifier] = value
+    return MappingProxyType(values)
+
+def vertex_group_anchors(o):
+    """Coordinates of the vertices in the intuitionRF_anchors vertex group"""
+    # dump box need no meshing an neither do "None"
+    if o.intuitionRF_properties.object_type in ("dumpbox", "none"):
+        return np.zeros((0, 3))
+    # skip objects that have no anchors assigned
+    if "intuitionRF_anchors" not in o.vertex_groups:
+        return np.zeros((0, 3))
+
+    # need to iterate over all vertices and check their weight in the group
+    intuitionRF_vgroup = o.vertex_groups['intuitionRF_anchors'].index
+    anchors = []
+    for v in o.data.vertices:
+        weights = [group.weight for group in v.groups if group.group == intuitionRF_vgroup]
+        # check in group, any nonzero weight will do
+        if len(weights) == 1 and weights[0] != 0: 
+            anchors.append(tuple(v.co))
+    return np.array(anchors).reshape(-1, 3)
+
+def snapshot_object(o, depsgraph):
+    evaluated_obj = o.evaluated_get(depsgraph)
+    mesh = None
+    anchors = vertex_group_anchors(o)
+    if o.type == 'MESH':
+        mesh = mesh_arrays(evaluated_obj.data)
+        # anchors may also come from named attributes stored in geometry nodes
+        attribute_anchors = mesh.attributes.get("intuitionrf.anchor")
+        if attribute_anchors is not None:
+            anchors = np.vstack((anchors, np.round(mesh.vertices[attribute_anchors], 5)))
+
+    return SceneObject(
+        name = o.name,
+        object_type = o.intuitionRF_properties.object_type,
+        properties = properties_snapshot(o.intuitionRF_properties),
+        matrix_world = read_only(np.array(o.matrix_world)),
+        bound_box = tuple(tuple(vert) for vert in o.bound_box),
+        mesh = mesh,
+        anchors = read_only(anchors),
+    )
+
+def scene_snapshot(context):
+    """Walk the simulation objects once, evaluating each of them once, and capture
+    what mesh line extraction and CSX building need into a read only snapshot"""
+    depsgraph = context.evaluated_depsgraph_get()
     objects_collection = context.scene.intuitionRF_objects.objects
-
-    for o in objects_collection:
-        if o.intuitionRF_properties.object_type == "metal_aa_faces":
-            polygons = o.data.polygons
-            vertices = o.data.vertices
-
-            for index, polygon in enumerate(polygons):
-                # add a CSX polygon each 
-                # improvement: use single polygon for convex continuous same-normal polygon sets
-                local_verts = [vertices[polygon.vertices[i]].co for i in range(len(polygon.vertices))]
-                co = [[round(i[0], 5), 
-                       round(i[1], 5), 
-                       round(i[2], 5)] for i in local_verts]
-                normal, elevation, points = get_axis(co)
-                if normal != "None":
-                    metal = CSX.AddMetal(f"{o.name}_{index}")
-                    prim = metal.AddPolygon(points, normal, elevation)
-                    prim.SetPriority(10)
-                    dirs = 'xyz'.replace(normal, '')
-                    mesh_res = context.scene.intuitionRF_smooth_mesh
-                    #FDTD.AddEdges2Grid(dirs=dirs, properties=metal, metal_edge_res=mesh_res/2)
-
-        # export metals (volume)
-        if o.intuitionRF_properties.object_type == "metal_volume":
-            filename = f"{context.scene.intuitionRF_simdir}/{o.name}.stl"
-            bpy.ops.object.select_all(action='DESELECT')
-            o.select_set(True)
-
-            unit = context.scene.intuitionRF_unit
-            # fix for blender 4.2
-            #bpy.ops.export_mesh.stl(filepath=filename, ascii=True, use_selection=True)
-            bpy.ops.wm.stl_export(filepath=filename, ascii_format=True, export_selected_objects=True)
-
-            # immediately reimport mesh as a CSX metal part
+    return tuple(snapshot_object(o, depsgraph) for o in objects_collection)
+
+def mesh_triangles(mesh, matrix=None, polygons=None):
+    """Triangulated vertices and faces of snapshot mesh arrays.
+    matrix moves the vertices to world space, polygons is an optional boolean mask
+    of the faces to keep"""
+    vertices = mesh.vertices
+    faces = mesh.triangles
+
+    if polygons is not None:
+        faces = faces[polygons[mesh.triangle_polygons]]
+
+    if matrix is not None:
+        vertices = vertices @ matrix[:3, :3].T + matrix[:3, 3]
+
+    return vertices, faces
+
+def export_polyhedron(prop, vertices, faces, context, name, priority=None):
+    """Add triangles to a CSX property, in memory or through a binary STL in the sim dir"""
+    stl_file = None
+    if context.scene.intuitionRF_polyhedron_export == 'stl':
+        stl_file = f"{context.scene.intuitionRF_simdir}/{name}.stl"
+    return csx_export.add_polyhedron(prop, vertices, faces, stl_file, priority)
+
+def aa_faces(mesh, polygons=None):
+    """Axis aligned polygons of snapshot mesh arrays as (normal, elevation, points), others are skipped.
+    polygons is an optional boolean mask of the faces to consider"""
+    co = np.round(mesh.vertices, 5)
+    return csx_export.axis_aligned_faces(co, mesh.corners, mesh.loop_starts, mesh.loop_totals, polygons)
+
+def export_object(FDTD, CSX, o, context):
+    """Add the CSX primitives of one snapshot object, ports and dump boxes aside.
+    Returns the number of primitives saved by merging faces"""
+    merged = 0
+    if o.object_type == "metal_aa_faces":
+        # connected same-normal faces are merged into single polygons or boxes
+        faces = aa_faces(o.mesh)
+        if len(faces) > 0:
             metal = CSX.AddMetal(o.name)
-            # import STL file
-            #
-            start, stop = start_stop_from_BB(o.bound_box)
-            #metal.AddBox(start, stop)
-            reader = metal.AddPolyhedronReader(filename)
-            reader.SetPriority(10)
-            reader.SetFileType(1) # 1 STL, 2 PLY 
-            reader.ReadFile()
-            reader.Update()
-            reader.SetPrimitiveUsed(True)
-
-        if o.intuitionRF_properties.object_type == "metal_edges":
-            edges = o.data.edges
-            vertices = o.data.vertices
+            merged += csx_export.add_merged_faces(metal, faces, priority=10)
 
-            metal = CSX.AddMetal(o.name)
+    # export metals (volume)
+    if o.object_type == "metal_volume":
+        # hand the world space triangles over to CSX as a metal part
+        vertices, faces = mesh_triangles(o.mesh, o.matrix_world)
+        metal = CSX.AddMetal(o.name)
+        export_polyhedron(metal, vertices, faces, context, o.name, priority=10)
+
+    if o.object_type == "metal_edges":
+        metal = CSX.AddMetal(o.name)
+
+        # TODO rounding
+        for segment in o.mesh.vertices[o.mesh.edges]:
+            metal.AddCurve(segment.T)
 
-            for index, edge in enumerate(edges):
-                # TODO rounding
-                v0 = vertices[edge.vertices[0]].co
-                v1 = vertices[edge.vertices[1]].co
+    if o.object_type == "material":
+        vertices, faces = mesh_triangles(o.mesh, o.matrix_world)
+
+        # hand the world space triangles over to CSX as a material part
+        if o.properties['material_use_kappa']:
+            material = CSX.AddMaterial(
+                o.name, 
+                epsilon = o.properties['material_epsilon'],
+                kappa = o.properties['material_kappa']
+            )
+        else:
+            material = CSX.AddMaterial(
+                o.name, 
+                epsilon = o.properties['material_epsilon'],
+            )
+        export_polyhedron(material, vertices, faces, context, o.name)
+
+    # might night to change name later to account for making modifiers used in the setup
+    # (not currently the case)
+    if o.object_type == "geometry_node":
+        # now we look for vertices flagged with known attributes
+        attributes = o.mesh.attributes
+
+        if "intuitionrf.pec_edge" in attributes:
+            pec_edges_from_geometry_nodes(o, FDTD, CSX)
+
+        if "intuitionrf.pec_aa_face" in attributes:
+            merged += pec_aa_faces_from_geometry_nodes(o, FDTD, CSX)
+
+        if "intuitionrf.pec_volume" in attributes:
+            pec_volume_from_geometry_nodes(o, context, FDTD, CSX)
+
+        if "intuitionrf.epsilonr" in attributes:
+            material_from_geometry_nodes(o, context, FDTD, CSX)
+
+    return merged
+
+def snapshot_digest(o, context):
+    """Content hash of a snapshot object and of the scene settings its export depends on"""
+    digest = hashlib.sha1()
+    digest.update(repr((EXPORT_CACHE_VERSION, o.name, o.object_type, sorted(o.properties.items()),
+                        context.scene.intuitionRF_polyhedron_export,
+                        context.scene.intuitionRF_simdir)).encode())
+    digest.update(o.matrix_world.tobytes())
+    if o.mesh is not None:
+        arrays = [(field, array) for field, array in zip(o.mesh._fields, o.mesh) if field != 'attributes']
+        arrays += sorted(o.mesh.attributes.items())
+        for name, array in arrays:
+            digest.update(f"{name} {array.dtype} {array.shape}".encode())
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+def export_cache_dir(context):
+    return f"{context.scene.intuitionRF_simdir}/.export_cache"
+
+def cached_export(FDTD, CSX, o, context):
+    """Export an object through the cache: unchanged objects replay the CSX calls
+    recorded on a previous export, others are exported and recorded.
+    Returns the primitives saved by merging faces and the cache file used"""
+    cache_file = f"{export_cache_dir(context)}/{snapshot_digest(o, context)}.npz"
+    fragment = csx_export.load_fragment(cache_file)
+    if fragment is None:
+        recorder = csx_export.Recorder()
+        merged = export_object(FDTD, recorder, o, context)
+        csx_export.save_fragment(cache_file, recorder, merged)
+        export_cache_stats['exported'] += 1
+    else:
+        recorder, merged = fragment
+        export_cache_stats['reused'] += 1
 
-                coords = np.array([v0, v1])
-                metal.AddCurve(coords.T)
+    recorder.replay(CSX)
+    return merged, cache_file
 
-        if o.intuitionRF_properties.object_type == "dumpbox":
+def objects_from_scene(FDTD, CSX, context, snapshot=None):
+    """Exports relevant objects into the continous structure """
+    global merged_primitives
+    merged_primitives = 0
+    export_cache_stats['reused'] = 0
+    export_cache_stats['exported'] = 0
+    if snapshot is None:
+        snapshot = scene_snapshot(context)
+
+    cache_files = set()
+    for o in snapshot:
+        if o.object_type == "dumpbox":
             start, stop = start_stop_from_BB(o.bound_box)
             # TODO make this cacheable
              
@@ -807,73 +1715,47 @@ def objects_from_scene(FDTD, CSX, context):
                 os.remove(f)
 
             dumpbox = CSX.AddDump(filename_prefix)
-            dumpbox.SetDumpType(int(o.intuitionRF_properties.dump_type))
-            dumpbox.SetDumpMode(int(o.intuitionRF_properties.dump_mode))
+            dumpbox.SetDumpType(int(o.properties['dump_type']))
+            dumpbox.SetDumpMode(int(o.properties['dump_mode']))
+            dumpbox.SetFileType(int(o.properties['dump_file_type']))
+            # openEMS uses the optimal resolution when set, the sub-sampling otherwise
+            if o.properties['dump_sampling'] == 'subsampling':
+                dumpbox.SetSubSampling(list(o.properties['dump_subsampling']))
+            elif o.properties['dump_sampling'] == 'resolution':
+                dumpbox.SetOptResolution(list(o.properties['dump_resolution']))
+            if int(o.properties['dump_type']) >= 10:
+                # frequency domain dumps are computed at a single frequency
+                frequency = o.properties['fd_frequency'] or context.scene.center_freq
+                dumpbox.SetFrequency([frequency * 1e6])
             dumpbox.AddBox(start, stop)
 
-        if o.intuitionRF_properties.object_type == "material":
-            filename = f"{context.scene.intuitionRF_simdir}/{o.name}.stl"
-            bpy.ops.object.select_all(action='DESELECT')
-            o.select_set(True)
-            #bpy.ops.export_mesh.stl(filepath=filename, ascii=True, use_selection=True)
-            bpy.ops.wm.stl_export(filepath=filename, ascii_format=True, export_selected_objects=True)
-
-            # immediately reimport mesh as a CSX metal part
-            if o.intuitionRF_properties.material_use_kappa:
-                material = CSX.AddMaterial(
-                    o.name, 
-                    epsilon = o.intuitionRF_properties.material_epsilon,
-                    kappa = o.intuitionRF_properties.material_kappa
-                )
+        if o.object_type in CACHED_OBJECT_TYPES:
+            if context.scene.intuitionRF_export_cache:
+                merged, cache_file = cached_export(FDTD, CSX, o, context)
+                cache_files.add(os.path.basename(cache_file))
             else:
-                material = CSX.AddMaterial(
-                    o.name, 
-                    epsilon = o.intuitionRF_properties.material_epsilon,
-                )
-            # import STL file
-            #
-            start, stop = start_stop_from_BB(o.bound_box)
-            #metal.AddBox(start, stop)
-            reader = material.AddPolyhedronReader(filename)
-            reader.SetFileType(1) # 1 STL, 2 PLY 
-            reader.ReadFile()
-            reader.Update()
-            reader.SetPrimitiveUsed(True)
-
-        # might night to change name later to account for making modifiers used in the setup
-        # (not currently the case)
-        if o.intuitionRF_properties.object_type == "geometry_node":
-            depsgraph = context.evaluated_depsgraph_get()
-            evaluated_obj = o.evaluated_get(depsgraph)
+                merged = export_object(FDTD, CSX, o, context)
+            merged_primitives += merged
 
-            # now we look for vertices flagged with known attributes
-            attributes = evaluated_obj.data.attributes
+        # ports carry the lumped port handles used after the run, they are never cached
+        if o.object_type == "geometry_node" and "intuitionrf.port_index" in o.mesh.attributes:
+            ports_from_geometry_nodes(o, FDTD, CSX)
 
-            for attribute in attributes:
-                if attribute.name == "intuitionrf.port_index":
-                    ports_from_geometry_nodes(evaluated_obj, FDTD, CSX)
-
-                if attribute.name == "intuitionrf.pec_edge":
-                    pec_edges_from_geometry_nodes(evaluated_obj, FDTD, CSX)
-
-                if attribute.name == "intuitionrf.pec_aa_face":
-                    pec_aa_faces_from_geometry_nodes(evaluated_obj, FDTD, CSX)
-
-                if attribute.name == "intuitionrf.pec_volume":
-                    pec_volume_from_geometry_nodes(evaluated_obj, context, FDTD, CSX)
-
-                if attribute.name == "intuitionrf.epsilonr":
-                    material_from_geometry_nodes(evaluated_obj, context, FDTD, CSX)
+    # drop the fragments of objects that changed or left the scene
+    if context.scene.intuitionRF_export_cache:
+        for cache_file in glob.glob(f"{export_cache_dir(context)}/*.npz"):
+            if os.path.basename(cache_file) not in cache_files:
+                os.remove(cache_file)
 
     # needed to add ports after every other element
     # TODO handle ports defined in geometry nodes
-    for o in objects_collection:
-        if o.intuitionRF_properties.object_type == "port":
+    for o in snapshot:
+        if o.object_type == "port":
             start, stop = start_stop_from_BB(o.bound_box)
-            impedance = o.intuitionRF_properties.port_impedance
-            port_number = o.intuitionRF_properties.port_number
-            direction = o.intuitionRF_properties.port_direction
-            excite = 1.0 if o.intuitionRF_properties.port_active else 0.0 
+            impedance = o.properties['port_impedance']
+            port_number = o.properties['port_number']
+            direction = o.properties['port_direction']
+            excite = 1.0 if o.properties['port_active'] else 0.0 
             port = FDTD.AddLumpedPort(port_number, impedance, 
                 start, stop, direction, excite)
 
@@ -881,248 +1763,141 @@ def objects_from_scene(FDTD, CSX, context):
 
     return FDTD, CSX 
 
-def material_from_geometry_nodes(evaluated_obj, context, FDTD, CSX):
-    pass
+def material_from_geometry_nodes(scene_obj, context, FDTD, CSX):
+    mesh = scene_obj.mesh
 
     # sort materials according to their use of kappa, epsilon and (optional) kappa values
     # assume the presence of 'use_kappa' and 'kappa' if 'epsilonR' present
-    material_data =  zip(evaluated_obj.data.polygons, 
-                         evaluated_obj.data.attributes['intuitionrf.epsilonr'].data,
-                         evaluated_obj.data.attributes['intuitionrf.use_kappa'].data,
-                         evaluated_obj.data.attributes['intuitionrf.kappa'].data
-                         )
-    # filter out 0-epsilonR materials (epsilonR = 0 isn't possible and is use to mark faces as not part of a material)
-    material_data = [item for item in material_data if item[1].value != 0]
-
-    materials = defaultdict(lambda: [])
-    for index, item in enumerate(material_data):
-        # we will have a tuple as the key here because we don't want to nest the 
-        # dictionnary output
-        materials[(item[1].value, item[2].value, item[3].value)].append(item[0])
-
-    # now for each material we found we export the STL
-    # and reimport it into OpenEMS immediately
-    # TODO de-duplicate this whole export STL section
-    for index, (key, polygons) in enumerate(materials.items()):
-        epsilonR = key[0]
-        use_kappa = key[1]
-        kappa = key[2]
-        
-        mesh = bpy.data.meshes.new(f"{evaluated_obj.name}.material.{index}.tmp")
-        obj = bpy.data.objects.new(f"{evaluated_obj.name}.material.{index}.tmp", mesh)
-
-        # add all vertices from the source object, just not all the faces
-        # this will litter the tmp object with potentially unused vertices 
-        # but they will be lost on stl export (terrible solution, but it works)
-        # which avoids rewriting all face vertices indices
-        # In this case rounding vertex coords is not curcially important because 
-        # it is meant to be evaluated as a mesh anyway
-        vertices = [item.co for item in evaluated_obj.data.vertices]
-        faces = []
-
-        for polygon in polygons:
-            faces.append(polygon.vertices)
+    epsilon = mesh.attributes['intuitionrf.epsilonr']
+    use_kappa = mesh.attributes['intuitionrf.use_kappa']
+    kappa = mesh.attributes['intuitionrf.kappa']
 
-        mesh.from_pydata(vertices, [], faces)
-        mesh.update()
+    # filter out 0-epsilonR materials (epsilonR = 0 isn't possible and is use to mark faces as not part of a material)
+    valid = epsilon != 0
+    if not valid.any():
+        return
 
-        context.collection.objects.link(obj)
+    # one material per distinct (epsilon, use_kappa, kappa) row, in order of first appearance
+    keys = np.stack((epsilon, use_kappa, kappa), axis=1).astype(np.float64)
+    materials, first, inverse = np.unique(keys[valid], axis=0, return_index=True, return_inverse=True)
+    polygon_material = np.full(len(epsilon), -1)
+    polygon_material[valid] = inverse.reshape(-1)
 
-        filename = f"{context.scene.intuitionRF_simdir}/{evaluated_obj.name}.material.{index}.stl"
-        bpy.ops.object.select_all(action='DESELECT')
-        obj.select_set(True)
+    # triangulate once, each material then picks its own faces.
+    # Rounding vertex coords is not curcially important because 
+    # it is meant to be evaluated as a mesh anyway
+    vertices = mesh.vertices
+    triangles = mesh.triangles
+    triangle_material = polygon_material[mesh.triangle_polygons]
 
-        #bpy.ops.export_mesh.stl(filepath=filename, ascii=True, use_selection=True)
-        bpy.ops.wm.stl_export(filepath=filename, ascii_format=True, export_selected_objects=True)
+    for index, group in enumerate(np.argsort(first)):
+        epsilonR, material_use_kappa, material_kappa = materials[group]
+        faces = triangles[triangle_material == group]
 
-        if use_kappa:
+        if material_use_kappa:
             material = CSX.AddMaterial(
-                f"{evaluated_obj.name}.material.{index}",
-                epsilon = epsilonR,
-                kappa = kappa,
+                f"{scene_obj.name}.material.{index}",
+                epsilon = float(epsilonR),
+                kappa = float(material_kappa),
             )
         else:
             material = CSX.AddMaterial(
-                f"{evaluated_obj.name}.material.{index}",
-                epsilon = epsilonR,
+                f"{scene_obj.name}.material.{index}",
+                epsilon = float(epsilonR),
             )
 
-        reader = material.AddPolyhedronReader(filename)
-        reader.SetFileType(1) # 1 STL, 2 PLY 
-        reader.ReadFile()
-        reader.Update()
-        reader.SetPrimitiveUsed(True)
-
-        bpy.data.objects.remove(obj, do_unlink=True)
-
+        export_polyhedron(material, vertices, faces, context, f"{scene_obj.name}.material.{index}")
 
-def pec_volume_from_geometry_nodes(evaluated_obj, context, FDTD, CSX):
-    # need to 
-    # - create a new object, 
-    # - populate it with the data, 
-    # - export stl, 
-    # - delete object and 
-    # - reimport object
 
-    # now extract the vertices and faces if interest and then put them into the new object 
-    # there is probably a better way to achieve this
-    pec_data = zip(evaluated_obj.data.polygons, evaluated_obj.data.attributes['intuitionrf.pec_volume'].data)
-
-    # filter out faces of interest
-    pec_data = [item for item in pec_data if item[1].value == True]
-    if len(pec_data) == 0:
+def pec_volume_from_geometry_nodes(scene_obj, context, FDTD, CSX):
+    # extract the faces of interest and hand them over to CSX as a single
+    # polyhedron, without going through a temporary object
+    mask = scene_obj.mesh.attributes['intuitionrf.pec_volume']
+    if not mask.any():
         return 
 
-    mesh = bpy.data.meshes.new(f"{evaluated_obj.name}.pec_volume.tmp")
-    obj = bpy.data.objects.new(f"{evaluated_obj.name}.pec_volume.tmp", mesh)
-
-    # add all vertices from the source object, just not all the faces
-    # this will litter the tmp object with potentially unused vertices 
-    # but they will be lost on stl export (terrible solution, but it works)
-    # which avoids rewriting all face vertices indices
-    # In this case rounding vertex coords is not curcially important because 
-    # it is meant to be evaluated as a mesh anyway
-    vertices = [item.co for item in evaluated_obj.data.vertices]
-    faces = []
-    for index, item in enumerate(pec_data):
-        polygon = item[0].vertices
-
-        faces.append(polygon)
-
-    mesh.from_pydata(vertices, [], faces)
-    mesh.update()
-
-    context.collection.objects.link(obj)
+    # vertices come straight from the evaluated mesh, unused ones are dropped before export
+    vertices, faces = mesh_triangles(scene_obj.mesh, polygons=mask)
 
-    filename = f"{context.scene.intuitionRF_simdir}/{evaluated_obj.name}.metal_volume.stl"
-    bpy.ops.object.select_all(action='DESELECT')
-    obj.select_set(True)
-
-    #bpy.ops.export_mesh.stl(filepath=filename, ascii=True, use_selection=True)
-    bpy.ops.wm.stl_export(filepath=filename, ascii_format=True, export_selected_objects=True)
-
-    # immediately reimport mesh as a CSX metal part
-    metal = CSX.AddMetal(f"{evaluated_obj.name}.pec_volume")
-
-    reader = metal.AddPolyhedronReader(filename)
-    reader.SetPriority(10)
-    reader.SetFileType(1) # 1 STL, 2 PLY 
-    reader.ReadFile()
-    reader.Update()
-    reader.SetPrimitiveUsed(True)
-
-    bpy.data.objects.remove(obj, do_unlink=True)
-
-def pec_aa_faces_from_geometry_nodes(evaluated_obj, FDTD, CSX):
-    pec_data = zip(evaluated_obj.data.polygons, evaluated_obj.data.attributes['intuitionrf.pec_aa_face'].data)
+    metal = CSX.AddMetal(f"{scene_obj.name}.pec_volume")
+    export_polyhedron(metal, vertices, faces, context, f"{scene_obj.name}.metal_volume", priority=10)
 
+def pec_aa_faces_from_geometry_nodes(scene_obj, FDTD, CSX):
+    """Export the flagged axis aligned faces, returns the number of primitives saved by merging"""
     # filter out the faces we need
-    pec_data = [item for item in pec_data if item[1].value == True]
-    if len(pec_data) == 0:
-        return
+    mask = scene_obj.mesh.attributes['intuitionrf.pec_aa_face']
+    if not mask.any():
+        return 0
 
-    for index, item in enumerate(pec_data):
-        # extract vertices from PEC face
+    faces = aa_faces(scene_obj.mesh, mask)
+    if len(faces) == 0:
+        return 0
 
-        # TODO de-duplicate this code from the objects aa face from destructive 
-        # topology
-        polygon = item[0]
-        vertices = evaluated_obj.data.vertices
-        local_verts = [vertices[polygon.vertices[i]].co for i in range(len(polygon.vertices))]
-        co = [[round(i[0], 5), 
-                round(i[1], 5), 
-                round(i[2], 5)] for i in local_verts]
-        normal, elevation, points = get_axis(co)
-
-        if normal != "None":
-            metal = CSX.AddMetal(f"{evaluated_obj.name}.pec_aa_face.{index}")
-            prim = metal.AddPolygon(points, normal, elevation)
-            prim.SetPriority(10)
-
-def pec_edges_from_geometry_nodes(evaluated_obj, FDTD, CSX):
-    pec_data = zip(evaluated_obj.data.edges, evaluated_obj.data.attributes['intuitionrf.pec_edge'].data)
+    metal = CSX.AddMetal(f"{scene_obj.name}.pec_aa_face")
+    return csx_export.add_merged_faces(metal, faces, priority=10)
 
+def pec_edges_from_geometry_nodes(scene_obj, FDTD, CSX):
+    mesh = scene_obj.mesh
 
     # filter out any list with no pec edges at all 
     # such as not to add empty curve primitives to the SIM
-    pec_data = [item for item in pec_data if item[1].value == True]
-    if len(pec_data) == 0:
+    selected = mesh.attributes['intuitionrf.pec_edge']
+    if not selected.any():
         return
 
-    metal = CSX.AddMetal(f"{evaluated_obj.name}.edges")
-
-    for item in pec_data:
+    # (n, 2, 3) rounded end points of the selected edges
+    segments = np.round(mesh.vertices, 5)[mesh.edges[selected]]
 
-        v0 = evaluated_obj.data.vertices[item[0].vertices[0]].co 
-        v1 = evaluated_obj.data.vertices[item[0].vertices[1]].co
+    metal = CSX.AddMetal(f"{scene_obj.name}.edges")
+    for segment in segments:
+        metal.AddCurve(segment.T)
 
-        # round coords 
-        v0[0] = round(v0[0], 5)
-        v0[1] = round(v0[1], 5)
-        v0[2] = round(v0[2], 5)
-        v1[0] = round(v1[0], 5)
-        v1[1] = round(v1[1], 5)
-        v1[2] = round(v1[2], 5)
-        coords = np.array([v0, v1])
-        metal.AddCurve(coords.T)
 
-
-def ports_from_geometry_nodes(evaluated_obj, FDTD, CSX):
+def ports_from_geometry_nodes(scene_obj, FDTD, CSX):
     # assume other required attributes are defined aswell 
     # (user didn't add store named attribute node of name 'intuitionrf.port_index')
-    
-    port_data = zip(evaluated_obj.data.vertices, 
-        evaluated_obj.data.attributes['intuitionrf.port_index'].data, 
-        evaluated_obj.data.attributes['intuitionrf.port_impedance'].data, 
-        evaluated_obj.data.attributes['intuitionrf.port_axis'].data, 
-        evaluated_obj.data.attributes['intuitionrf.port_active'].data 
-        )
-
-    port_dict = defaultdict(lambda: []) # map each port data by the port index
-    # ports[index] = [(vertex, impedance, axis, active), (vertex, impedance, axis, active), ...]
-    for item in port_data:
-        if item[1].value == 0: # invalid port index 
-            continue
-        # we want to extract the actual float values from the nested data structures here for 
-        # further processing
-        port_dict[item[1].value].append(list(tuple(
-            (
-                # x,y,z coords of the point
-                round(item[0].co[0], 5), 
-                round(item[0].co[1], 5),
-                round(item[0].co[2], 5),
-                item[2].value, 
-                # x, y, z coords of the orientation at the point
-                round(item[3].vector[0], 5), 
-                round(item[3].vector[1], 5), 
-                round(item[3].vector[2], 5), 
-                item[4].value
-            )
-        )))
-
-    # now we find for each port the average orienation vector, average active value, etc.. 
-    for key, value in port_dict.items(): 
-        value = np.array(value)
-        min_x, min_y, min_z = (np.min(value[:,0]), np.min(value[:,1]), np.min(value[:,2]))
-        max_x, max_y, max_z = (np.max(value[:,0]), np.max(value[:,1]), np.max(value[:,2]))
-        axis_x, axis_y, axis_z = (np.mean(value[:,4]), np.mean(value[:,5]), np.mean(value[:,6]))
-        axis_x, axis_y, axis_z = (abs(axis_x), abs(axis_y), abs(axis_z))
+    mesh = scene_obj.mesh
+    port_index = mesh.attributes['intuitionrf.port_index']
+    valid = port_index != 0 # invalid port index 
+
+    port_index = port_index[valid]
+    co = np.round(mesh.vertices, 5)[valid]
+    impedance = mesh.attributes['intuitionrf.port_impedance'][valid].astype(np.float64)
+    orientation = np.round(mesh.attributes['intuitionrf.port_axis'][valid].astype(np.float64), 5)
+    active = mesh.attributes['intuitionrf.port_active'][valid]
+
+    # now we find for each port the bounds, average orienation vector, average active value, etc.. 
+    # sorting by port index puts each port's vertices in a contiguous run
+    order = np.argsort(port_index, kind='stable')
+    keys, starts, counts = np.unique(port_index[order], return_index=True, return_counts=True)
+    if len(keys) == 0:
+        return
+    lower = np.minimum.reduceat(co[order], starts)
+    upper = np.maximum.reduceat(co[order], starts)
+    axes = np.abs(np.add.reduceat(orientation[order], starts) / counts[:, None])
+    impedances = np.add.reduceat(impedance[order], starts) / counts
+    actives = np.add.reduceat(active[order].astype(np.float64), starts) / counts
+
+    for group, key in enumerate(keys.tolist()):
+        min_x, min_y, min_z = lower[group].tolist()
+        max_x, max_y, max_z = upper[group].tolist()
+        axis_x, axis_y, axis_z = axes[group]
         axis = "x"
         if axis_y > axis_x and axis_y > axis_z:
             axis = 'y'
         if axis_z > axis_x and axis_z > axis_y:
             axis = 'z'
 
-        impedance = np.mean(value[:,3])
-        active = float(np.mean(value[:,7]) > 0)
+        impedance_mean = float(impedances[group])
+        port_active = float(actives[group] > 0)
 
-        port = FDTD.AddLumpedPort(key, impedance, 
-            [min_x, min_y, min_z], [max_x, max_y, max_z], axis, active)
+        port = FDTD.AddLumpedPort(key, impedance_mean, 
+            [min_x, min_y, min_z], [max_x, max_y, max_z], axis, port_active)
 
         # register it in the port list for later processing
         ports[str(key)] = port
 
-def meshlines_from_scene(CSX, context):
+def meshlines_from_scene(CSX, context, snapshot=None):
     lines = context.scene.intuitionRF_lines
     x, y, z = extract_lines_xyz(lines)
     
@@ -1136,7 +1911,7 @@ def meshlines_from_scene(CSX, context):
     mesh.AddLine('z', list(z))
 
     # also extract lines from objects
-    CSX = meshlines_from_vertex_groups(CSX, context)
+    CSX = meshlines_from_vertex_groups(CSX, context, snapshot)
 
     # smooth as required by user
     if context.scene.intuitionRF_smooth_mesh:
@@ -1149,50 +1924,19 @@ def meshlines_from_scene(CSX, context):
         pass
     return CSX
 
-def meshlines_from_vertex_groups(CSX, context):
+def meshlines_from_vertex_groups(CSX, context, snapshot=None):
     # extract list of coordinates from vertex group named 'intuitionRF_verts'
+    # and from vertices flagged with the intuitionrf.anchor attribute in geometry nodes
+    if snapshot is None:
+        snapshot = scene_snapshot(context)
+
     x = set() 
     y = set()
     z = set()
-
-    objects_collection = context.scene.intuitionRF_objects.objects
-    for o in objects_collection:
-        # dump box need no meshing an neither do "None"
-        if o.intuitionRF_properties.object_type == "dumpbox":
-            continue
-        if o.intuitionRF_properties.object_type == "none":
-            continue
-        # skip objects that have no anchors assigned
-        if "intuitionRF_anchors" not in o.vertex_groups:
-            continue
-
-        # need to iterate over all vertices and check their weight in the group
-        intuitionRF_vgroup = o.vertex_groups['intuitionRF_anchors'].index
-        verts = o.data.vertices
-        for v in verts:
-            weights = [group.weight for group in v.groups if group.group == intuitionRF_vgroup]
-            # check in group, any nonzero weight will do
-            if len(weights) == 1 and weights[0] != 0: 
-                
-                x.add(v.co[0])
-                y.add(v.co[1])
-                z.add(v.co[2])
-
-    # TODO loop the collection only once
-    for o in objects_collection:
-        # we also want to extract vertices from named attributes stored in geometry nodes
-        # TODO merge this with the above as to apply modifiers everywhere
-        dg = context.evaluated_depsgraph_get()
-        evaluated_object = o.evaluated_get(dg)
-        attr_anchors = [attr for attr in evaluated_object.data.attributes if attr.name == "intuitionrf.anchor"]
-        if len(attr_anchors) == 1:
-            attr_anchors = attr_anchors[0]
-            for i, v in enumerate(evaluated_object.data.vertices):
-                if attr_anchors.data[i].value == True:
-
-                    x.add(round(v.co[0], 5)) 
-                    y.add(round(v.co[1], 5))
-                    z.add(round(v.co[2], 5))
+    for o in snapshot:
+        x.update(o.anchors[:, 0].tolist())
+        y.update(o.anchors[:, 1].tolist())
+        z.update(o.anchors[:, 2].tolist())
 
     mesh = CSX.GetGrid()
     # put lines in CSXCAD        
@@ -1214,13 +1958,15 @@ class IntuitionRF_OT_add_preview_lines(bpy.types.Operator):
 
         FDTD = openEMS(NrTS=1, EndCriteria=1e-4)
 
+        # evaluate the scene objects once for both mesh lines and CSX primitives
+        snapshot = scene_snapshot(context)
         CSX = CSXCAD.ContinuousStructure()
-        CSX = meshlines_from_scene(CSX, context)
+        CSX = meshlines_from_scene(CSX, context, snapshot)
         FDTD.SetCSX(CSX)
         FDTD.SetGaussExcite( context.scene.center_freq * 1e6, context.scene.cutoff_freq * 1e6)
         FDTD.SetBoundaryCond( ['MUR', 'MUR', 'MUR', 'MUR', 'MUR', 'MUR'] )
 
-        FDTD, CSX = objects_from_scene(FDTD, CSX, context)
+        FDTD, CSX = objects_from_scene(FDTD, CSX, context, snapshot)
         mesh = CSX.GetGrid()
         
         # retrieve lines
@@ -1296,8 +2042,16 @@ def register():
 
     bpy.utils.register_class(IntuitionRF_OT_convert_volume_single_frame)
     bpy.utils.register_class(IntuitionRF_OT_convert_volume_all_frames)
+    bpy.utils.register_class(IntuitionRF_OT_set_volume_lod)
+    bpy.utils.register_class(IntuitionRF_OT_convert_volume_live)
+    bpy.utils.register_class(IntuitionRF_OT_estimate_dump)
+    bpy.utils.register_class(IntuitionRF_OT_estimate_conversion)
+    bpy.utils.register_class(IntuitionRF_OT_slice_dump)
 
 def unregister():
+    # stop the conversion workers kept warm between conversions
+    convert.shutdown_pool()
+
     bpy.utils.unregister_class(IntuitionRF_OT_add_meshline_x)
     bpy.utils.unregister_class(IntuitionRF_OT_add_meshline_y)    
     bpy.utils.unregister_class(IntuitionRF_OT_add_meshline_z)    
@@ -1316,3 +2070,8 @@ def unregister():
     bpy.utils.unregister_class(IntuitionRF_OT_plot_impedance)
     bpy.utils.unregister_class(IntuitionRF_OT_compute_NF2FF)
     bpy.utils.unregister_class(IntuitionRF_OT_check_updates)
+    bpy.utils.unregister_class(IntuitionRF_OT_set_volume_lod)
+    bpy.utils.unregister_class(IntuitionRF_OT_convert_volume_live)
+    bpy.utils.unregister_class(IntuitionRF_OT_estimate_dump)
+    bpy.utils.unregister_class(IntuitionRF_OT_estimate_conversion)
+    bpy.utils.unregister_class(IntuitionRF_OT_slice_dump)
@@ -77,6 +77,89 @@ class IntuitionRF_ObjectProperties(bpy.types.PropertyGroup):
         ]
     )
 
+    dump_file_type: bpy.props.EnumProperty(
+        name = 'File Type',
+        description = 'Dump file format', 
+        items = [
+            ("0", "VTK", "one vtr file per timestep"),
+            ("1", "HDF5", "all timesteps in a single h5 file, read frame by frame and slab by slab when converting")
+        ],
+        default = "0"
+    )
+
+    dump_sampling: bpy.props.EnumProperty(
+        name = 'Sampling',
+        description = 'Spatial resolution openEMS records the dump at',
+        items = [
+            ('full', 'Full mesh', 'Every mesh line of the dump box'),
+            ('subsampling', 'Sub-sampling', 'Every n-th mesh line along each axis'),
+            ('resolution', 'Resolution', 'Mesh lines picked for a target spacing along each axis'),
+        ],
+        default = 'full',
+    )
+
+    dump_subsampling: bpy.props.IntVectorProperty(
+        name = 'Sub-sampling',
+        description = 'Keep one mesh line out of n along x, y and z',
+        size = 3,
+        default = (2, 2, 2),
+        min = 1,
+    )
+
+    dump_resolution: bpy.props.FloatVectorProperty(
+        name = 'Resolution',
+        description = 'Target spacing of the recorded lines along x, y and z (scene units)',
+        size = 3,
+        default = (1, 1, 1),
+        min = 0,
+    )
+
+    fd_frequency: bpy.props.FloatProperty(
+        name = 'Frequency (MHz)',
+        description = 'Frequency of a frequency-domain dump (0 uses the scene center frequency)',
+        default = 0,
+        min = 0,
+    )
+
+    phase_steps: bpy.props.IntProperty(
+        name = 'Phase steps',
+        description = 'Number of frames synthesized over one period of a frequency-domain E or H field dump',
+        default = 24,
+        min = 2,
+    )
+
+    resolution_mode: bpy.props.EnumProperty(
+        name = 'Resolution',
+        description = 'How the cell size of the converted volume is chosen',
+        items = [
+            ('dicing', 'Dicing factor', 'Multiple of the smallest cell of the dump'),
+            ('voxels', 'Voxel budget', 'Largest grid under a number of voxels per frame'),
+            ('memory', 'Memory budget', 'Largest grid whose output grids fit a memory size per frame'),
+        ],
+        default = 'dicing',
+    )
+
+    voxel_budget: bpy.props.IntProperty(
+        name = 'Voxels per frame',
+        description = 'Maximum number of voxels of the converted volume',
+        default = 8000000,
+        min = 1000,
+    )
+
+    frame_memory_budget: bpy.props.IntProperty(
+        name = 'MB per frame',
+        description = 'Maximum size of a converted frame\'s grids (dense float32) in memory',
+        default = 256,
+        min = 1,
+    )
+
+    seconds_per_voxel: bpy.props.FloatProperty(
+        name = 'Seconds per voxel',
+        description = 'Conversion time per voxel and grid measured on the last conversion, for estimates',
+        default = 0,
+        min = 0,
+    )
+
     dicing_factor: bpy.props.IntProperty(
         name = 'Dicing factor',
         description = 'Dicing factor as a multiple of the computed cell size (smallest irregular grid cell size)',
@@ -85,6 +168,132 @@ class IntuitionRF_ObjectProperties(bpy.types.PropertyGroup):
 
     use_log: bpy.props.BoolProperty(name = 'use_log', default=True)
 
+    normalization: bpy.props.EnumProperty(
+        name = 'Normalization',
+        description = 'Offset and scale applied to the log of the magnitude',
+        items = [
+            ('fixed', 'Fixed', 'Fixed offset (15) and scale (0.01), the mapping volume shaders of existing projects are tuned for. May clip or waste range depending on the sim'),
+            ('sequence', 'Sequence', 'Map the range of all frames of the dump box onto [0, 1] (pre-scans all frames once, cached in the sim directory)'),
+        ],
+        default = 'fixed',
+    )
+
+    normalization_percentile: bpy.props.FloatProperty(
+        name = 'Low percentile',
+        description = 'Magnitude percentile (over all frames) mapped to 0, lower values are clamped',
+        default = 1.0,
+        min = 0,
+        max = 100,
+    )
+
+    output_grids: bpy.props.EnumProperty(
+        name = 'Grids',
+        description = 'Grids to compute and write for each converted frame',
+        items = [
+            ('magnitude', 'magnitude', 'Log scaled field magnitude'),
+            ('sobel', 'sobel', 'Sum of the magnitude gradients'),
+            ('sobel_x', 'sobel_x', 'Magnitude gradient (x kernel)'),
+            ('sobel_y', 'sobel_y', 'Magnitude gradient (y kernel)'),
+            ('sobel_z', 'sobel_z', 'Magnitude gradient (z kernel)'),
+            ('field_x', 'field_x', 'x component of the field (Ex, Hx, ...)'),
+            ('field_y', 'field_y', 'y component of the field (Ey, Hy, ...)'),
+            ('field_z', 'field_z', 'z component of the field (Ez, Hz, ...)'),
+            ('energy_density', 'energy_density', 'Field energy density (1/2 \u03B5|E|\u00B2 or 1/2 \u03BC|H|\u00B2)'),
+        ],
+        options = {'ENUM_FLAG'},
+        default = {'magnitude'},
+    )
+
+    use_sparse: bpy.props.BoolProperty(
+        name = 'Sparse output',
+        description = 'Leave voxels close to the background value inactive instead of storing them',
+        default = False,
+    )
+
+    sparse_threshold: bpy.props.FloatProperty(
+        name = 'Threshold',
+        description = 'Voxels of the log scaled magnitude and gradient grids within this distance of the background value are left inactive',
+        default = .01,
+        min = 0,
+    )
+
+    sparse_background: bpy.props.FloatProperty(
+        name = 'Background',
+        description = 'Value of inactive voxels',
+        default = 0,
+    )
+
+    sparse_prune: bpy.props.BoolProperty(
+        name = 'Prune',
+        description = 'Collapse uniform inactive regions into tiles',
+        default = True,
+    )
+
+    lod_levels: bpy.props.EnumProperty(
+        name = 'Preview levels',
+        description = 'Downsampled copies of each frame written next to the full resolution one, for interactive viewport playback',
+        items = [
+            ('2', '1/2', 'Preview level downsampled 2x along each axis'),
+            ('4', '1/4', 'Preview level downsampled 4x along each axis'),
+        ],
+        options = {'ENUM_FLAG'},
+        default = set(),
+    )
+
+    half_float: bpy.props.BoolProperty(
+        name = 'Half float',
+        description = 'Store the grids as 16 bit floats, halves the files at the cost of precision',
+        default = False,
+    )
+
+    slice_axis: bpy.props.EnumProperty(
+        name = 'Slice axis',
+        description = 'Axis normal to the slice plane',
+        items = [
+            ('x', 'x', 'Slice in the yz plane'),
+            ('y', 'y', 'Slice in the xz plane'),
+            ('z', 'z', 'Slice in the xy plane'),
+        ],
+        default = 'z',
+    )
+
+    slice_position: bpy.props.FloatProperty(
+        name = 'Position',
+        description = 'Position of the slice accross the dump box along its axis',
+        default = 0.5,
+        min = 0,
+        max = 1,
+        subtype = 'FACTOR',
+    )
+
+    slice_resolution: bpy.props.IntProperty(
+        name = 'Resolution',
+        description = 'Pixels along the longest side of the slice images',
+        default = 512,
+        min = 2,
+    )
+
+    slice_colormap: bpy.props.EnumProperty(
+        name = 'Colormap',
+        description = 'Colour map of the slice images',
+        items = [
+            ('viridis', 'viridis', 'viridis'),
+            ('plasma', 'plasma', 'plasma'),
+            ('inferno', 'inferno', 'inferno'),
+            ('magma', 'magma', 'magma'),
+            ('jet', 'jet', 'jet'),
+            ('coolwarm', 'coolwarm', 'coolwarm'),
+        ],
+        default = 'viridis',
+    )
+
+    memory_budget: bpy.props.IntProperty(
+        name = 'Memory budget (MB)',
+        description = 'Per worker memory ceiling for the conversion, the volume is processed in slabs to stay under it. 0 processes the whole volume at once',
+        default = 0,
+        min = 0,
+    )
+
     thread_count: bpy.props.IntProperty(
         name = 'thread count',
         description = 'Number of thread for multi-frame compute',
@@ -139,11 +348,85 @@ class OBJECT_PT_intuitionRFPanel(bpy.types.Panel):
             row = layout.row()
             row.prop(obj.intuitionRF_properties, "dump_mode")
             row = layout.row()
+            row.prop(obj.intuitionRF_properties, "dump_file_type")
+            row = layout.row()
+            row.prop(obj.intuitionRF_properties, "dump_sampling")
+            row = layout.row()
+            if obj.intuitionRF_properties.dump_sampling == 'subsampling':
+                row.prop(obj.intuitionRF_properties, "dump_subsampling")
+                row = layout.row()
+            elif obj.intuitionRF_properties.dump_sampling == 'resolution':
+                row.prop(obj.intuitionRF_properties, "dump_resolution")
+                row = layout.row()
+            if int(obj.intuitionRF_properties.dump_type) < 10:
+                # openEMS dumps every time domain dump at the same interval
+                row.prop(context.scene, "intuitionRF_oversampling", text="Oversampling (all dumps)")
+                row = layout.row()
+            row.operator("intuitionrf.estimate_dump")
+            estimate = meshing.dump_estimates.get(obj.name)
+            if estimate is not None:
+                row = layout.row()
+                nx, ny, nz = estimate['lines']
+                row.label(text=f"{nx} x {ny} x {nz} lines, {estimate['frame_bytes'] / 1024**2:.1f} MB per file")
+                row = layout.row()
+                source = "as last run" if estimate['from_last_run'] else "at least, excitation only"
+                row.label(text=f"{estimate['frames']} files ({source}), "
+                               f"{estimate['frames'] * estimate['frame_bytes'] / 1024**3:.2f} GB")
+                if estimate['interval'] is not None:
+                    row = layout.row()
+                    row.label(text=f"one frame every {estimate['interval'] * 1e12:.1f} ps")
+            row = layout.row()
+            if int(obj.intuitionRF_properties.dump_type) >= 10:
+                row.prop(obj.intuitionRF_properties, "fd_frequency")
+                row = layout.row()
+            if obj.intuitionRF_properties.dump_type in ("10", "11", "12", "13"):
+                row.prop(obj.intuitionRF_properties, "phase_steps")
+                row = layout.row()
             box = row.box()
             row = box.row()
             row.label(text="Convert to Blender volume")
             row = box.row()
-            row.prop(obj.intuitionRF_properties, "dicing_factor")
+            row.prop(obj.intuitionRF_properties, "resolution_mode")
+            row = box.row()
+            if obj.intuitionRF_properties.resolution_mode == 'voxels':
+                row.prop(obj.intuitionRF_properties, "voxel_budget")
+            elif obj.intuitionRF_properties.resolution_mode == 'memory':
+                row.prop(obj.intuitionRF_properties, "frame_memory_budget")
+            else:
+                row.prop(obj.intuitionRF_properties, "dicing_factor")
+            row = box.row()
+            row.operator("intuitionrf.estimate_conversion")
+            estimate = meshing.conversion_estimate(obj)
+            if estimate is not None:
+                row = box.row()
+                nx, ny, nz = estimate['shape']
+                row.label(text=f"{nx} x {ny} x {nz} grid, {estimate['frame_bytes'] / 1024**2:.1f} MB per frame")
+                row = box.row()
+                row.label(text=f"~{estimate['frame_seconds']:.1f}s per frame, "
+                               f"~{estimate['total_seconds']:.0f}s for {estimate['frame_count']} frames")
+            row = box.row()
+            col = box.column(align=True)
+            col.prop(obj.intuitionRF_properties, "output_grids", expand=True)
+            row = box.row()
+            row.prop(obj.intuitionRF_properties, "use_log")
+            if obj.intuitionRF_properties.use_log:
+                row.prop(obj.intuitionRF_properties, "normalization")
+                if obj.intuitionRF_properties.normalization == 'sequence':
+                    row = box.row()
+                    row.prop(obj.intuitionRF_properties, "normalization_percentile")
+            row = box.row()
+            row.prop(obj.intuitionRF_properties, "use_sparse")
+            if obj.intuitionRF_properties.use_sparse:
+                row.prop(obj.intuitionRF_properties, "sparse_prune")
+                row = box.row()
+                row.prop(obj.intuitionRF_properties, "sparse_threshold")
+                row.prop(obj.intuitionRF_properties, "sparse_background")
+            row = box.row()
+            row.prop(obj.intuitionRF_properties, "lod_levels")
+            row = box.row()
+            row.prop(obj.intuitionRF_properties, "half_float")
+            row = box.row()
+            row.prop(obj.intuitionRF_properties, "memory_budget")
             row = box.row()
             row.operator("intuitionrf.convert_volume_single_frame")
             row = box.row()
@@ -151,6 +434,28 @@ class OBJECT_PT_intuitionRFPanel(bpy.types.Panel):
             row.prop(obj.intuitionRF_properties, "thread_count")
             row = box.row()
             row.operator("intuitionrf.convert_volume_all_frames")
+            row = box.row()
+            row.operator("intuitionrf.convert_volume_live")
+            row = layout.row()
+            box = row.box()
+            row = box.row()
+            row.label(text="Field slice")
+            row = box.row()
+            row.prop(obj.intuitionRF_properties, "slice_axis", expand=True)
+            row = box.row()
+            row.prop(obj.intuitionRF_properties, "slice_position")
+            row = box.row()
+            row.prop(obj.intuitionRF_properties, "slice_resolution")
+            row.prop(obj.intuitionRF_properties, "slice_colormap")
+            row = box.row()
+            row.operator("intuitionrf.slice_dump")
+
+        if obj.type == 'VOLUME':
+            row = layout.row()
+            row.label(text="Volume level")
+            row.operator("intuitionrf.set_volume_lod", text="Full").factor = 1
+            row.operator("intuitionrf.set_volume_lod", text="1/2").factor = 2
+            row.operator("intuitionrf.set_volume_lod", text="1/4").factor = 4
             
 def register():
     # register object classes
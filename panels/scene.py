@@ -76,6 +76,9 @@ class IntuitionRFPanel(bpy.types.Panel):
         row = box.row()
         row.prop(scene, 'intuitionRF_simdir')
         row = box.row()
+        row.prop(scene, 'intuitionRF_polyhedron_export')
+        row.prop(scene, 'intuitionRF_export_cache')
+        row = box.row()
         row.operator("intuitionrf.preview_csx")
         row.operator("intuitionrf.preview_pec_dump")
 
@@ -168,6 +171,22 @@ is 1mm in simulation""",
         subtype='DIR_PATH'
     )
 
+    bpy.types.Scene.intuitionRF_polyhedron_export = bpy.props.EnumProperty(
+        name = 'Volumes',
+        description = 'How volume meshes are handed over to CSXCAD',
+        items = [
+            ('memory', 'In memory', 'Pass vertices and faces directly to a CSX polyhedron'),
+            ('stl', 'Binary STL', 'Write a binary STL to the simulation directory and read it back'),
+        ],
+        default = 'memory'
+    )
+
+    bpy.types.Scene.intuitionRF_export_cache = bpy.props.BoolProperty(
+        name = 'Reuse unchanged objects',
+        description = 'Cache each object export in the simulation directory and reuse it while the object is unchanged',
+        default = True
+    )
+
     bpy.types.Scene.intuitionRF_resonnant_freq = bpy.props.FloatProperty(
         name = 'Resonnant frequency (MHz)',
         default = 0
@@ -201,4 +220,6 @@ def unregister():
     del bpy.types.Scene.intuitionRF_smooth_max_res
     del bpy.types.Scene.intuitionRF_smooth_ratio
     del bpy.types.Scene.intuitionRF_PEC_dump
-    del bpy.types.Scene.intuitionRF_simdir 
+    del bpy.types.Scene.intuitionRF_simdir
+    del bpy.types.Scene.intuitionRF_polyhedron_export
+    del bpy.types.Scene.intuitionRF_export_cache 
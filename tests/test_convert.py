@@ -0,0 +1,126 @@
+# run with: python -m pytest tests
+import sys
+import os
+import pytest
+from unittest.mock import MagicMock
+
+pytest.importorskip('scipy')
+try:
+    import pyopenvdb
+except ImportError:
+    # only the grid writing needs vdb, stub it the way convert.py stubs vtk modules
+    sys.modules['pyopenvdb'] = MagicMock()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'operators'))
+import convert
+from convert import np
+from scipy.ndimage import correlate
+
+# a dump box flat along z, as recorded on a plane
+FLAT_AXES = (np.linspace(0, 10, 11), np.linspace(0, 5, 6), np.array([2.0]))
+
+@pytest.mark.parametrize('settings', [{'dicing_factor': 2}, {'voxel_budget': 1000}])
+def test_flat_axis_gets_a_single_plane(settings):
+    plan = convert.ResamplingPlan(FLAT_AXES, **settings)
+    assert plan.shape[2] == 1
+    assert plan.shape[0] > 1 and plan.shape[1] > 1
+
+    volume = np.random.default_rng(0).uniform(size=plan.source_shape)
+    resampled = plan.apply(volume)
+    assert resampled.shape == plan.shape
+    # corners of the regular grid fall on source lines
+    assert np.isclose(resampled[0, 0, 0], volume[0, 0, 0])
+    assert np.isclose(resampled[-1, -1, 0], volume[-1, -1, 0])
+
+def test_single_point_dump():
+    axes = tuple(np.array([1.0]) for _ in range(3))
+    for settings in ({'dicing_factor': 8}, {'voxel_budget': 1000}):
+        plan = convert.ResamplingPlan(axes, **settings)
+        assert plan.shape == (1, 1, 1)
+        assert plan.apply(np.full((1, 1, 1), 3.0))[0, 0, 0] == 3.0
+
+def test_sobel_gradient_matches_the_dense_kernel():
+    volume = np.random.default_rng(1).uniform(size=(7, 6, 5))
+    w = np.array([[1, 3, 1], [3, 6, 3], [1, 3, 1]], dtype=float)
+    for axis in range(3):
+        # [1, 0, -1] along axis times w over the two others
+        kernel = np.moveaxis(np.array([1, 0, -1], dtype=float)[:, None, None] * w, 0, axis)
+        dense = np.abs(correlate(volume, kernel, mode='reflect'))
+        assert np.allclose(convert.sobel_gradient(volume, axis), dense)
+
+def write_raw_vtr(vtr_file, axes, point_data):
+    """Minimal raw appended vtr, as openEMS writes them"""
+    blocks = [np.ascontiguousarray(point_data.transpose(2, 1, 0, 3), dtype='<f4')]
+    blocks += [np.asarray(axis, dtype='<f8') for axis in axes]
+    offsets = np.cumsum([0] + [4 + block.nbytes for block in blocks])
+    extent = ' '.join(f"0 {len(axis) - 1}" for axis in axes)
+    arrays = [f'<DataArray type="Float64" format="appended" offset="{offset}"/>' for offset in offsets[1:4]]
+    header = (f'<VTKFile type="RectilinearGrid" version="0.1" byte_order="LittleEndian" header_type="UInt32">'
+              f'<RectilinearGrid WholeExtent="{extent}"><Piece Extent="{extent}">'
+              f'<PointData><DataArray type="Float32" Name="E-Field" NumberOfComponents="3" format="appended" offset="0"/></PointData>'
+              f'<Coordinates>{"".join(arrays)}</Coordinates></Piece></RectilinearGrid>'
+              f'<AppendedData encoding="raw">_')
+    with open(vtr_file, 'wb') as f:
+        f.write(header.encode())
+        for block in blocks:
+            f.write(np.uint32(block.nbytes).tobytes())
+            f.write(block.tobytes())
+        f.write(b'</AppendedData></VTKFile>')
+
+def test_native_vtr_reader(tmp_path):
+    axes = (np.linspace(0, 1, 4), np.linspace(0, 2, 3), np.array([0.0, .5]))
+    point_data = np.random.default_rng(2).uniform(size=(4, 3, 2, 3)).astype(np.float32)
+    vtr_file = str(tmp_path / 'dump.vtr')
+    write_raw_vtr(vtr_file, axes, point_data)
+
+    read_axes, read_data = convert.read_vtr_native(vtr_file)
+    for axis, read_axis in zip(axes, read_axes):
+        assert np.array_equal(axis, read_axis)
+    assert np.array_equal(read_data, point_data)
+
+def test_h5_field_data_reads_hyperslabs(tmp_path):
+    h5py = pytest.importorskip('h5py')
+    axes = (np.linspace(0, 1, 5), np.linspace(0, 1, 4), np.linspace(0, 1, 3))
+    # openEMS layout, [component][z][y][x]
+    stored = np.random.default_rng(3).uniform(size=(3, 3, 4, 5))
+    h5_file = str(tmp_path / 'dump.h5')
+    with h5py.File(h5_file, 'w') as f:
+        for name, axis in zip('xyz', axes):
+            f[f'/Mesh/{name}'] = axis
+        f[f'{convert.H5_TD_GROUP}/00000010'] = stored
+
+    frames = convert.h5_frames(h5_file)
+    read_axes, data = convert.read_frame(frames[0])
+    expected = stored.transpose(3, 2, 1, 0)
+    for key in [(slice(None),) * 3, (slice(1, 3),), (slice(None), slice(2, 4)),
+                (slice(None), slice(None), slice(1, 2)), (1, slice(None), slice(0, 2), 2)]:
+        assert np.array_equal(data[key], expected[key])
+
+class Grid:
+    """FloatGrid stand in keeping the last array copied into it"""
+    def __init__(self, background=0.0):
+        self.background = background
+
+    def copyFromArray(self, volume, ijk=(0, 0, 0), tolerance=0):
+        self.volume = volume.copy()
+        self.active = np.abs(volume - self.background) > tolerance
+
+def test_sparse_threshold_only_applies_to_normalised_grids():
+    assert convert.grid_tolerance('magnitude', .01) == .01
+    assert convert.grid_tolerance('sobel_x', .01) == .01
+    assert convert.grid_tolerance('magnitude', .01, use_log=False) == 0
+    assert convert.grid_tolerance('magnitude', None) == 0
+
+    # an energy density is far below any threshold on the normalised scale
+    energy = np.full((2, 2, 2), 1e-6, dtype=np.float32)
+    grid = Grid()
+    convert.copy_to_grid(grid, energy, tolerance=convert.grid_tolerance('energy_density', .01))
+    assert grid.active.all()
+    assert np.array_equal(grid.volume, energy)
+
+def test_copy_to_grid_leaves_the_volume_untouched():
+    volume = np.array([[[.001, .5]]], dtype=np.float32)
+    grid = Grid()
+    convert.copy_to_grid(grid, volume, tolerance=.01)
+    assert np.array_equal(grid.volume, [[[0, .5]]])
+    assert grid.volume.dtype == np.float32 and grid.volume.flags.c_contiguous
+    assert volume[0, 0, 0] == np.float32(.001)
@@ -0,0 +1,94 @@
+# run with: python -m pytest tests
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'operators'))
+import csx_export
+
+def quad(x0, y0, x1, y1, elevation=0.0):
+    return ('z', elevation, [[x0, x1, x1, x0], [y0, y0, y1, y1]])
+
+def test_grid_merges_into_a_box():
+    faces = [quad(x, y, x + 1, y + 1) for x in range(3) for y in range(3)]
+    polygons, boxes = csx_export.merge_coplanar_faces(faces)
+    assert polygons == []
+    assert boxes == [([0.0, 0.0, 0.0], [3.0, 3.0, 0.0])]
+
+def test_l_shape_merges_into_a_polygon():
+    faces = [quad(0, 0, 1, 1), quad(1, 0, 2, 1), quad(0, 1, 1, 2)]
+    polygons, boxes = csx_export.merge_coplanar_faces(faces)
+    assert boxes == []
+    assert len(polygons) == 1
+    assert len(polygons[0][2][0]) == 6
+
+def test_duplicated_faces_fall_back_to_individual_faces():
+    faces = [quad(0, 0, 1, 1), quad(0, 0, 1, 1)]
+    polygons, boxes = csx_export.merge_coplanar_faces(faces)
+    assert polygons == []
+    assert len(boxes) == 2
+
+def plain(value):
+    """Nested lists of a call argument, so recorded and direct calls compare equal"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    return value
+
+class Log:
+    """CSX stand in logging the calls made on it and on what they return"""
+    def __init__(self, log=None):
+        self.log = [] if log is None else log
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            self.log.append((method, plain(args), kwargs))
+            return Log(self.log)
+        return call
+
+def test_recorded_export_round_trips_through_the_cache(tmp_path):
+    vertices = csx_export.np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [5, 5, 5]], dtype=float)
+    faces = csx_export.np.array([[0, 2, 1], [0, 1, 3], [0, 3, 2], [1, 2, 3]])
+
+    def export(CSX):
+        metal = CSX.AddMetal('metal')
+        csx_export.add_polyhedron(metal, vertices, faces, priority=10)
+        metal.AddCurve(vertices[:2].T)
+        metal.AddBox([0, 0, 0], (1.0, 2.0, 3.0)).SetPriority(5)
+
+    recorder = csx_export.Recorder()
+    export(recorder)
+    # the polyhedron is a single entry holding its arrays
+    assert [call[0] for call in recorder.calls[0][3].calls] == ['polyhedron', 'AddCurve', 'AddBox']
+
+    cache_file = str(tmp_path / 'fragment.npz')
+    csx_export.save_fragment(cache_file, recorder, merged=2)
+    loaded, merged = csx_export.load_fragment(cache_file)
+    assert merged == 2
+
+    direct, replayed = Log(), Log()
+    export(direct)
+    loaded.replay(replayed)
+    assert replayed.log == direct.log
+
+def test_corrupt_fragment_is_a_cache_miss(tmp_path):
+    cache_file = tmp_path / 'fragment.npz'
+    cache_file.write_bytes(b'not a fragment')
+    assert csx_export.load_fragment(str(cache_file)) is None
+    assert csx_export.load_fragment(str(tmp_path / 'missing.npz')) is None
+
+def test_axis_aligned_faces():
+    np = csx_export.np
+    vertices = np.array([[0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1],   # z = 1 quad
+                         [2, 0, 0], [2, 1, 0], [2, 1, 1],              # x = 2 triangle
+                         [0, 0, 0], [1, 1, 0], [0, 1, 1]], dtype=float)  # slanted
+    corners = np.array([7, 8, 9, 0, 1, 2, 3, 4, 5, 6])
+    # loops of a polygon need not follow the polygon order
+    loop_starts, loop_totals = np.array([3, 7, 0]), np.array([4, 3, 3])
+
+    faces = csx_export.axis_aligned_faces(vertices, corners, loop_starts, loop_totals)
+    assert faces == [('z', 1.0, [[0.0, 1.0, 1.0, 0.0], [0.0, 0.0, 1.0, 1.0]]),
+                     ('x', 2.0, [[0.0, 1.0, 1.0], [0.0, 0.0, 1.0]])]
+
+    mask = np.array([False, True, True])
+    assert csx_export.axis_aligned_faces(vertices, corners, loop_starts, loop_totals, mask) == faces[1:]